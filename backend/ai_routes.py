@@ -1,18 +1,55 @@
-from fastapi import APIRouter, HTTPException
-from groq import Groq
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from response_cache import ResponseCache
+from conversations import ConversationStore
+from catalog_cache import catalog_cache
+from catalog_index import catalog_index
+from auth import require_admin, UserPrincipal
+from events import format_sse
+from metrics import record_span, timed
+from datetime import datetime, timezone
+import logging
 import os
-from dotenv import load_dotenv
+import time
 
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+CATALOG_TOP_K = int(os.getenv("AI_CATALOG_TOP_K", 5))
+catalog_cache.add_listener(catalog_index.mark_dirty)
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 
 class GroqAIService:
     def __init__(self):
-        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        self._client = None
         self.model = "llama3-8b-8192"
+        self.cache = ResponseCache(
+            max_entries=int(os.getenv("AI_CACHE_MAX_ENTRIES", 1024)),
+            ttl_seconds=int(os.getenv("AI_CACHE_TTL_SECONDS", 3600)),
+            similarity_threshold=float(os.getenv("AI_CACHE_SIMILARITY", 0))
+        )
+        self.conversations = ConversationStore(
+            max_sessions=int(os.getenv("AI_SESSION_MAX", 10000)),
+            idle_ttl_seconds=int(os.getenv("AI_SESSION_IDLE_SECONDS", 1800)),
+            history_token_budget=int(os.getenv("AI_SESSION_TOKEN_BUDGET", 1200))
+        )
+    
+    @property
+    def client(self):
+        # Built on first use: the groq SDK is slow to import, and a client
+        # created in a preloading master would share its connection pool
+        # with every forked worker
+        if self._client is None:
+            from groq import AsyncGroq
+            self._client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+        return self._client
     
-    def get_system_prompt(self, context=None):
+    @client.setter
+    def client(self, client):
+        self._client = client
+    
+    def get_system_prompt(self, context=None, catalog=None):
         base_prompt = """You are a helpful AI assistant for MediCart Pharmacy. You provide information about:
 - Medicine availability and pricing
 - Prescription requirements and upload process
@@ -33,35 +70,101 @@ Important guidelines:
 - Be clear about medication side effects and interactions when asked
 """
 
+        if catalog:
+            base_prompt += (
+                "\nLive catalog matches for this question (current price, stock and prescription status):\n"
+                f"{catalog}\n"
+                "Quote prices and availability only from these lines; if the medicine asked about isn't listed, "
+                "say you couldn't find it in our catalog.\n"
+            )
+        
         if context:
             context_str = f"\nCurrent context: {context}"
             base_prompt += context_str
         
         return base_prompt
     
-    def get_response(self, message: str, context: dict = None):
+    def build_messages(self, message: str, context: dict = None, history: list = None, catalog: str = None):
+        return [
+            {"role": "system", "content": self.get_system_prompt(context, catalog)},
+            *(history or []),
+            {"role": "user", "content": message}
+        ]
+    
+    async def get_response(self, message: str, context: dict = None, use_cache: bool = True, history: list = None, catalog: str = None):
+        # Follow-ups depend on the earlier turns, so only opening messages are cached
+        use_cache = use_cache and not history
+        # Answers quote live stock and prices, so they're keyed on the catalog lines too
+        cache_context = {**(context or {}), "_catalog": catalog} if catalog else context
+        if use_cache:
+            cached = self.cache.get(message, cache_context)
+            if cached is not None:
+                return cached
+        
         try:
-            system_prompt = self.get_system_prompt(context)
+            with timed("groq.chat"):
+                chat_completion = await self.client.chat.completions.create(
+                    messages=self.build_messages(message, context, history, catalog),
+                    model=self.model,
+                    temperature=0.7,
+                    max_tokens=1024,
+                    top_p=1,
+                    stream=False,
+                )
             
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": message}
-            ]
+            response = chat_completion.choices[0].message.content
             
-            chat_completion = self.client.chat.completions.create(
-                messages=messages,
+        except Exception as e:
+            return self.get_fallback_response(message)
+        
+        if response and use_cache:
+            self.cache.set(message, response, cache_context)
+        return response
+    
+    async def stream_response(self, message: str, context: dict = None, use_cache: bool = True, history: list = None, catalog: str = None):
+        use_cache = use_cache and not history
+        # Answers quote live stock and prices, so they're keyed on the catalog lines too
+        cache_context = {**(context or {}), "_catalog": catalog} if catalog else context
+        if use_cache:
+            cached = self.cache.get(message, cache_context)
+            if cached is not None:
+                yield cached
+                return
+        
+        tokens = []
+        started = time.perf_counter()
+        outcome = "aborted"  # client went away mid-stream
+        try:
+            stream = await self.client.chat.completions.create(
+                messages=self.build_messages(message, context, history, catalog),
                 model=self.model,
                 temperature=0.7,
                 max_tokens=1024,
                 top_p=1,
-                stream=False,
+                stream=True,
             )
             
-            response = chat_completion.choices[0].message.content
-            return response
-            
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if not tokens:
+                        record_span("groq.first_token", time.perf_counter() - started)
+                    tokens.append(delta)
+                    yield delta
+            outcome = "ok"
+                    
         except Exception as e:
-            return self.get_fallback_response(message)
+            outcome = "error"
+            # Only fall back if nothing reached the client yet, otherwise
+            # the canned answer would be glued onto a partial response
+            if not tokens:
+                yield self.get_fallback_response(message)
+            return
+        finally:
+            record_span("groq.stream", time.perf_counter() - started, outcome)
+        
+        if tokens and use_cache:
+            self.cache.set(message, "".join(tokens), cache_context)
     
     def get_fallback_response(self, message: str):
         message_lower = message.lower()
@@ -83,29 +186,91 @@ Important guidelines:
 
 ai_service = GroqAIService()
 
+async def catalog_grounding(message: str):
+    # Grounding is best effort: if the catalog can't be read, answer from
+    # the index already loaded (possibly empty) rather than failing the chat
+    try:
+        await run_in_threadpool(catalog_index.ensure_fresh)
+    except Exception:
+        logger.exception("Catalog index refresh failed, answering without fresh catalog grounding")
+    return catalog_index.prompt_section(message, CATALOG_TOP_K)
+
 @router.post("/chat")
 async def chat_endpoint(request: dict):
     try:
         message = request.get("message")
         context = request.get("context", {})
+        use_cache = not request.get("bypass_cache", False)
         
         if not message:
             raise HTTPException(status_code=400, detail="Message is required")
         
-        response = ai_service.get_response(message, context)
+        # Clients send only the session id and the new message; unknown or
+        # expired ids start a new session
+        conversation = ai_service.conversations.get_or_create(request.get("session_id"))
+        catalog = await catalog_grounding(message)
+        response = await ai_service.get_response(message, context, use_cache, conversation.history_messages(), catalog)
+        ai_service.conversations.record(conversation, message, response)
         
         return {
             "response": response,
-            "timestamp": "2024-01-01T00:00:00Z"  # You can use datetime here
+            "session_id": conversation.id,
+            "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
 
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: dict):
+    message = request.get("message")
+    context = request.get("context", {})
+    use_cache = not request.get("bypass_cache", False)
+    
+    if not message:
+        raise HTTPException(status_code=400, detail="Message is required")
+    
+    conversation = ai_service.conversations.get_or_create(request.get("session_id"))
+    history = conversation.history_messages()
+    catalog = await catalog_grounding(message)
+    
+    async def event_stream():
+        yield format_sse({"session_id": conversation.id}, event="session")
+        tokens = []
+        async for token in ai_service.stream_response(message, context, use_cache, history, catalog):
+            tokens.append(token)
+            yield format_sse({"token": token})
+        ai_service.conversations.record(conversation, message, "".join(tokens))
+        yield format_sse({}, event="done")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/health")
 async def health_check():
     return {
         "status": "healthy",
         "service": "MediCart AI Assistant",
         "model": ai_service.model
-    }
\ No newline at end of file
+    }
+
+@router.get("/cache/stats")
+async def cache_stats(current_user: UserPrincipal = Depends(require_admin)):
+    return ai_service.cache.stats()
+
+@router.delete("/sessions/{session_id}")
+async def end_session(session_id: str):
+    if not ai_service.conversations.end(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"message": "Session ended"}
+
+@router.get("/sessions/stats")
+async def session_stats(current_user: UserPrincipal = Depends(require_admin)):
+    return ai_service.conversations.stats()
+
+@router.get("/catalog-index/stats")
+async def catalog_index_stats(current_user: UserPrincipal = Depends(require_admin)):
+    return catalog_index.stats()
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""Incremental daily rollups for the admin analytics endpoints.
+
+refresh_rollups() folds orders and prescription decisions that arrived
+since the last run into the sales_daily, sales_daily_totals and
+prescription_daily tables. Progress is kept per source in
+analytics_watermarks: the last order id for sales, the last
+(verified_at, id) for prescriptions. Each batch advances its watermark
+with a compare-and-set on the row version inside the same transaction
+as the rollup upserts. That makes concurrent refreshes from several
+workers or cron safe: the loser rolls back instead of double counting.
+
+Rows newer than ANALYTICS_SETTLE_SECONDS are left for the next run, so
+a checkout still committing when its id is passed isn't skipped. Sales
+are booked at checkout; later cancellations aren't subtracted.
+"""
+from sqlalchemy import and_, case, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import date, datetime, timedelta
+import numpy as np
+import os
+import models
+
+ANALYTICS_SETTLE_SECONDS = int(os.getenv("ANALYTICS_SETTLE_SECONDS", 60))
+REFRESH_BATCH_SIZE = int(os.getenv("ANALYTICS_REFRESH_BATCH_SIZE", 2000))
+
+class ConcurrentRefresh(Exception):
+    """Another refresh advanced the watermark first."""
+
+# The rollups upsert with ON CONFLICT, which only these dialects provide
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+def check_dialect(bind):
+    dialect = bind.dialect.name
+    if dialect not in UPSERT_INSERTS:
+        raise RuntimeError(f"analytics rollups need PostgreSQL or SQLite, not {dialect}")
+
+def insert_for(db, table):
+    bind = db.get_bind()
+    check_dialect(bind)
+    return UPSERT_INSERTS[bind.dialect.name](table)
+
+def add_to_rollup(db, model, rows, keys, maximums=()):
+    """Upsert rows, adding counters onto existing ones (and keeping maxima)."""
+    if not rows:
+        return
+    table = model.__table__
+    statement = insert_for(db, table)
+    excluded = statement.excluded
+    values = {}
+    for column in table.columns:
+        if column.name in keys:
+            continue
+        if column.name in maximums:
+            values[column.name] = case((excluded[column.name] > column, excluded[column.name]), else_=column)
+        else:
+            values[column.name] = column + excluded[column.name]
+    db.execute(statement.on_conflict_do_update(index_elements=keys, set_=values), rows)
+
+def load_watermark(db, name: str):
+    db.execute(insert_for(db, models.AnalyticsWatermark.__table__).on_conflict_do_nothing().values(
+        name=name, last_id=0, version=0
+    ))
+    # A plain row, not an ORM instance, so the version read here is the one
+    # compared in advance_watermark even if the session expires in between
+    watermark = models.AnalyticsWatermark
+    return db.execute(
+        select(watermark.name, watermark.last_id, watermark.last_at, watermark.version).where(watermark.name == name)
+    ).one()
+
+def advance_watermark(db, watermark, last_id: int, last_at: datetime = None):
+    result = db.execute(
+        update(models.AnalyticsWatermark)
+        .where(
+            models.AnalyticsWatermark.name == watermark.name,
+            models.AnalyticsWatermark.version == watermark.version
+        )
+        .values(last_id=last_id, last_at=last_at, version=watermark.version + 1, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        raise ConcurrentRefresh(watermark.name)
+
+def as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+def refresh_sales_batch(db, cutoff: datetime):
+    watermark = load_watermark(db, "orders")
+    orders = db.execute(
+        select(models.Order.id, models.Order.created_at)
+        .where(models.Order.id > watermark.last_id)
+        .order_by(models.Order.id)
+        .limit(REFRESH_BATCH_SIZE)
+    ).all()
+    # Stop at the first order still inside the settle window; ids after it
+    # wait for the next run so the watermark never jumps over it
+    settled = []
+    for order in orders:
+        if order.created_at is None or order.created_at >= cutoff:
+            break
+        settled.append(order)
+    if not settled:
+        return 0
+
+    order_days = {order.id: as_date(order.created_at) for order in settled}
+    items = db.execute(
+        select(
+            models.OrderItem.order_id, models.OrderItem.medicine_id,
+            models.OrderItem.quantity, models.OrderItem.price
+        ).where(
+            models.OrderItem.order_id > watermark.last_id,
+            models.OrderItem.order_id <= settled[-1].id
+        )
+    ).all()
+
+    per_medicine = {}
+    totals = {}
+    counted = set()
+    for day in order_days.values():
+        totals.setdefault(day, {"day": day, "orders": 0, "units": 0, "revenue": 0.0})["orders"] += 1
+    for item in items:
+        day = order_days[item.order_id]
+        row = per_medicine.setdefault((day, item.medicine_id), {
+            "day": day, "medicine_id": item.medicine_id, "orders": 0, "units": 0, "revenue": 0.0
+        })
+        if (item.order_id, item.medicine_id) not in counted:
+            counted.add((item.order_id, item.medicine_id))
+            row["orders"] += 1
+        row["units"] += item.quantity
+        row["revenue"] += item.price * item.quantity
+        totals[day]["units"] += item.quantity
+        totals[day]["revenue"] += item.price * item.quantity
+
+    advance_watermark(db, watermark, settled[-1].id)
+    add_to_rollup(db, models.SalesDaily, list(per_medicine.values()), ["day", "medicine_id"])
+    add_to_rollup(db, models.SalesDailyTotal, list(totals.values()), ["day"])
+    return len(settled)
+
+def refresh_prescriptions_batch(db, cutoff: datetime):
+    watermark = load_watermark(db, "prescriptions")
+    decided = models.Prescription.verified_at
+    statement = select(
+        models.Prescription.id, models.Prescription.status,
+        models.Prescription.created_at, decided
+    ).where(decided.is_not(None), decided < cutoff)
+    if watermark.last_at is not None:
+        statement = statement.where(or_(
+            decided > watermark.last_at,
+            and_(decided == watermark.last_at, models.Prescription.id > watermark.last_id)
+        ))
+    rows = db.execute(statement.order_by(decided, models.Prescription.id).limit(REFRESH_BATCH_SIZE)).all()
+    if not rows:
+        return 0
+
+    days = {}
+    for row in rows:
+        day = as_date(row.verified_at)
+        rollup = days.setdefault(day, {
+            "day": day, "verified": 0, "rejected": 0, "turnaround_seconds": 0.0, "max_turnaround_seconds": 0.0
+        })
+        rollup["verified" if row.status == "verified" else "rejected"] += 1
+        if row.created_at is not None:
+            seconds = max((row.verified_at - row.created_at).total_seconds(), 0.0)
+            rollup["turnaround_seconds"] += seconds
+            rollup["max_turnaround_seconds"] = max(rollup["max_turnaround_seconds"], seconds)
+
+    advance_watermark(db, watermark, rows[-1].id, rows[-1].verified_at)
+    add_to_rollup(db, models.PrescriptionDaily, list(days.values()), ["day"], maximums={"max_turnaround_seconds"})
+    return len(rows)
+
+def refresh_rollups(db):
+    """Fold everything new into the rollups; returns rows processed per source."""
+    # Fail before the first batch rather than partway through a fold
+    check_dialect(db.get_bind())
+    cutoff = datetime.utcnow() - timedelta(seconds=ANALYTICS_SETTLE_SECONDS)
+    processed = {"orders": 0, "prescriptions": 0}
+    for source, refresh_batch in (("orders", refresh_sales_batch), ("prescriptions", refresh_prescriptions_batch)):
+        while True:
+            try:
+                count = refresh_batch(db, cutoff)
+                db.commit()
+            except ConcurrentRefresh:
+                db.rollback()
+                break
+            except Exception:
+                db.rollback()
+                raise
+            processed[source] += count
+            if count < REFRESH_BATCH_SIZE:
+                break
+    return processed
+
+# Range queries read rollup rows into NumPy arrays, so a year of history
+# is a few hundred rows per series however many orders it covers
+
+def day_range(start: date, end: date):
+    return np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+
+def daily_series(db, model, start: date, end: date, columns):
+    """Per-day arrays for the given rollup columns, zero-filled on quiet days."""
+    days = day_range(start, end)
+    rows = db.execute(
+        select(model.day, *(getattr(model, column) for column in columns))
+        .where(model.day >= start, model.day <= end)
+    ).all()
+    series = {column: np.zeros(len(days)) for column in columns}
+    if rows:
+        index = (np.array([row.day for row in rows], dtype="datetime64[D]") - days[0]).astype(np.int64)
+        for position, column in enumerate(columns, start=1):
+            series[column][index] = [row[position] for row in rows]
+    return days, series
+
+def per_medicine_totals(db, start: date, end: date):
+    """(medicine ids, orders, units, revenue) summed over the range."""
+    rows = db.execute(
+        select(models.SalesDaily.medicine_id, models.SalesDaily.orders, models.SalesDaily.units, models.SalesDaily.revenue)
+        .where(models.SalesDaily.day >= start, models.SalesDaily.day <= end)
+    ).all()
+    if not rows:
+        empty = np.zeros(0)
+        return np.zeros(0, dtype=np.int64), empty, empty, empty
+    data = np.array(rows, dtype=np.float64)
+    medicine_ids, inverse = np.unique(data[:, 0].astype(np.int64), return_inverse=True)
+    return (
+        medicine_ids,
+        np.bincount(inverse, weights=data[:, 1]),
+        np.bincount(inverse, weights=data[:, 2]),
+        np.bincount(inverse, weights=data[:, 3]),
+    )
+
+def moving_average(values, window: int):
+    if len(values) < window:
+        return np.full(len(values), values.mean() if len(values) else 0.0)
+    totals = np.convolve(values, np.ones(window), mode="full")[:len(values)]
+    counts = np.minimum(np.arange(1, len(values) + 1), window)
+    return totals / counts
+
+def top_indices(values, limit: int):
+    if len(values) > limit:
+        top = np.argpartition(-values, limit)[:limit]
+    else:
+        top = np.arange(len(values))
+    return top[np.argsort(-values[top], kind="stable")]
\ No newline at end of file
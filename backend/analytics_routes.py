@@ -0,0 +1,173 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import date, datetime, timedelta
+import numpy as np
+import models
+import analytics
+from database import get_db
+from auth import require_admin, UserPrincipal
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+DEFAULT_RANGE_DAYS = 30
+MAX_RANGE_DAYS = 3 * 366
+
+def resolve_range(start: Optional[date], end: Optional[date]):
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Ranges are limited to {MAX_RANGE_DAYS} days")
+    return start, end
+
+def refreshed_at(db: Session):
+    return {
+        watermark.name: watermark.updated_at
+        for watermark in db.query(models.AnalyticsWatermark.name, models.AnalyticsWatermark.updated_at)
+    }
+
+def medicine_details(db: Session, medicine_ids, *columns):
+    return {
+        row.id: row
+        for row in db.execute(
+            select(models.Medicine.id, models.Medicine.name, *columns)
+            .where(models.Medicine.id.in_([int(medicine_id) for medicine_id in medicine_ids]))
+        )
+    }
+
+@router.post("/refresh")
+def refresh_analytics(db: Session = Depends(get_db), current_user: UserPrincipal = Depends(require_admin)):
+    try:
+        analytics.check_dialect(db.get_bind())
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return {"processed": analytics.refresh_rollups(db), "refreshed_at": refreshed_at(db)}
+
+@router.get("/sales")
+def get_sales(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_admin)
+):
+    start, end = resolve_range(start, end)
+    days, series = analytics.daily_series(db, models.SalesDailyTotal, start, end, ["orders", "units", "revenue"])
+    orders, revenue = series["orders"], series["revenue"]
+    total_orders = int(orders.sum())
+    return {
+        "start": start,
+        "end": end,
+        "days": days.astype(str).tolist(),
+        "orders": orders.astype(int).tolist(),
+        "units": series["units"].astype(int).tolist(),
+        "revenue": np.round(revenue, 2).tolist(),
+        "revenue_7d_average": np.round(analytics.moving_average(revenue, 7), 2).tolist(),
+        "totals": {
+            "orders": total_orders,
+            "units": int(series["units"].sum()),
+            "revenue": round(float(revenue.sum()), 2),
+            "average_order_value": round(float(revenue.sum()) / total_orders, 2) if total_orders else 0.0
+        },
+        "refreshed_at": refreshed_at(db)
+    }
+
+@router.get("/top-sellers")
+def get_top_sellers(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    by: str = Query("revenue", pattern="^(revenue|units)$"),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_admin)
+):
+    start, end = resolve_range(start, end)
+    medicine_ids, orders, units, revenue = analytics.per_medicine_totals(db, start, end)
+    top = analytics.top_indices(revenue if by == "revenue" else units, limit)
+    details = medicine_details(db, medicine_ids[top])
+    return {
+        "start": start,
+        "end": end,
+        "by": by,
+        "medicines": [
+            {
+                "medicine_id": int(medicine_ids[index]),
+                "name": details[medicine_ids[index]].name if medicine_ids[index] in details else None,
+                "orders": int(orders[index]),
+                "units": int(units[index]),
+                "revenue": round(float(revenue[index]), 2)
+            }
+            for index in top
+        ],
+        "refreshed_at": refreshed_at(db)
+    }
+
+@router.get("/stock-burn")
+def get_stock_burn(
+    days: int = Query(28, ge=1, le=365),
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_admin)
+):
+    """Medicines closest to running out at their recent daily sales rate."""
+    end = datetime.utcnow().date()
+    medicine_ids, _, units, _ = analytics.per_medicine_totals(db, end - timedelta(days=days - 1), end)
+    burn_rate = units / days
+    # Only medicines that sold in the window can run out, so the stock read
+    # is limited to those rows
+    details = {}
+    for offset in range(0, len(medicine_ids), 5000):
+        details.update(medicine_details(db, medicine_ids[offset:offset + 5000], models.Medicine.stock))
+    stock = np.array([
+        (details[medicine_id].stock or 0) if medicine_id in details else 0 for medicine_id in medicine_ids
+    ], dtype=np.float64)
+    days_left = np.divide(stock, burn_rate, out=np.full(len(stock), np.inf), where=burn_rate > 0)
+    order = np.argsort(days_left, kind="stable")[:limit]
+    return {
+        "window_days": days,
+        "medicines": [
+            {
+                "medicine_id": int(medicine_ids[index]),
+                "name": details[medicine_ids[index]].name if medicine_ids[index] in details else None,
+                "stock": int(stock[index]),
+                "units_per_day": round(float(burn_rate[index]), 2),
+                "days_of_stock_left": round(float(days_left[index]), 1) if np.isfinite(days_left[index]) else None
+            }
+            for index in order
+        ],
+        "refreshed_at": refreshed_at(db)
+    }
+
+@router.get("/prescriptions")
+def get_prescription_turnaround(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_admin)
+):
+    start, end = resolve_range(start, end)
+    days, series = analytics.daily_series(
+        db, models.PrescriptionDaily, start, end,
+        ["verified", "rejected", "turnaround_seconds", "max_turnaround_seconds"]
+    )
+    decisions = series["verified"] + series["rejected"]
+    average = np.divide(series["turnaround_seconds"], decisions, out=np.zeros(len(days)), where=decisions > 0)
+    total_decisions = int(decisions.sum())
+    return {
+        "start": start,
+        "end": end,
+        "days": days.astype(str).tolist(),
+        "verified": series["verified"].astype(int).tolist(),
+        "rejected": series["rejected"].astype(int).tolist(),
+        "average_turnaround_seconds": np.round(average, 1).tolist(),
+        "max_turnaround_seconds": np.round(series["max_turnaround_seconds"], 1).tolist(),
+        "totals": {
+            "verified": int(series["verified"].sum()),
+            "rejected": int(series["rejected"].sum()),
+            "average_turnaround_seconds": round(float(series["turnaround_seconds"].sum()) / total_decisions, 1) if total_decisions else 0.0,
+            "max_turnaround_seconds": round(float(series["max_turnaround_seconds"].max()), 1) if len(days) else 0.0
+        },
+        "refreshed_at": refreshed_at(db)
+    }
\ No newline at end of file
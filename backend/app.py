@@ -1,27 +1,62 @@
-from fastapi import FastAPI, Depends, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
-import models
-from database import engine, get_db
-from auth import router as auth_router, get_password_hash
+from dotenv import load_dotenv
+
+# Loaded once, before the routers read their settings
+load_dotenv()
+
+from auth import router as auth_router
 from medicine_routes import router as medicine_router
-from prescription_routes import router as prescription_router
+from prescription_routes import router as prescription_router, UploadSizeLimitMiddleware, ensure_upload_dirs
 from order_routes import router as order_router
 from consultation_routes import router as consultation_router
 from ai_routes import router as ai_router
+from queue_routes import router as queue_router
+from event_routes import router as event_router
+from inventory_routes import router as inventory_router
+from analytics_routes import router as analytics_router
+from database import engine, async_engine
+from metrics import MetricsMiddleware, instrument_engine, render_metrics
+import logging
 import os
-from dotenv import load_dotenv
+import time
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+# Schema and seed data are managed out of band: python manage.py init-db && python manage.py seed
+
+def report_ready():
+    # serve.py sets MEDICART_LAUNCHED_AT so each worker can report how long
+    # it took from launch to accepting requests
+    launched_at = os.getenv("MEDICART_LAUNCHED_AT")
+    if not launched_at:
+        return
+    elapsed_ms = (time.time() - float(launched_at)) * 1000
+    target_ms = float(os.getenv("COLD_START_TARGET_MS", 3000))
+    if elapsed_ms > target_ms:
+        logger.warning("Worker %d ready %.0f ms after launch, over the %.0f ms cold start target",
+                       os.getpid(), elapsed_ms, target_ms)
+    else:
+        logger.info("Worker %d ready %.0f ms after launch", os.getpid(), elapsed_ms)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Every launcher (serve.py, uvicorn app:app, python app.py) runs this,
+    # so /uploads works before the first prescription is uploaded
+    ensure_upload_dirs()
+    report_ready()
+    yield
 
 app = FastAPI(
     title="MediCart Pharmacy API",
     description="Backend API for MediCart Pharmacy",
-    version="1.0.0"
+    version="1.0.0",
+    # Routes declare pydantic response models; orjson then encodes the result
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -31,10 +66,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
-# Mount static files for uploaded prescriptions
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.add_middleware(UploadSizeLimitMiddleware)
+
+# Outermost, so its latencies include CORS and error handling
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine)
+
+# Mount static files for uploaded prescriptions; the directory is created at
+# startup, not at import
+app.mount("/uploads", StaticFiles(directory="uploads", check_dir=False), name="uploads")
 
 # Include routers
 app.include_router(auth_router, prefix="/api/auth")
@@ -43,11 +88,19 @@ app.include_router(prescription_router, prefix="/api")
 app.include_router(order_router, prefix="/api")
 app.include_router(consultation_router, prefix="/api")
 app.include_router(ai_router, prefix="/api")
+app.include_router(queue_router, prefix="/api")
+app.include_router(event_router, prefix="/api")
+app.include_router(inventory_router, prefix="/api")
+app.include_router(analytics_router, prefix="/api")
 
 @app.get("/")
 async def root():
     return {"message": "MediCart Pharmacy API is running"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/api/health")
 async def health_check():
     return {
@@ -56,67 +109,8 @@ async def health_check():
         "version": "1.0.0"
     }
 
-# Initialize with sample data
-@app.on_event("startup")
-async def startup_event():
-    db = next(get_db())
-    try:
-        # Create sample medicines if none exist
-        if db.query(models.Medicine).count() == 0:
-            sample_medicines = [
-                models.Medicine(
-                    name="Napa",
-                    description="Pain reliever and fever reducer",
-                    price=200.00,
-                    category="tablet",
-                    manufacturer="Beximco",
-                    stock=100,
-                    requires_prescription=False,
-                    is_featured=True
-                ),
-                models.Medicine(
-                    name="Disprin",
-                    description="Pain reliever tablet",
-                    price=250.00,
-                    category="tablet",
-                    manufacturer="Square",
-                    stock=50,
-                    requires_prescription=False,
-                    is_featured=True
-                ),
-                models.Medicine(
-                    name="Levofox",
-                    description="Antibiotic medication",
-                    price=500.00,
-                    category="tablet",
-                    manufacturer="Incepta",
-                    stock=30,
-                    requires_prescription=True,
-                    is_featured=True
-                )
-            ]
-            db.add_all(sample_medicines)
-            db.commit()
-        
-        # Create admin user if none exists
-        if db.query(models.User).filter(models.User.email == "admin@medicart.com").first() is None:
-            from auth import get_password_hash
-            admin_user = models.User(
-                name="Admin User",
-                email="admin@medicart.com",
-                password=get_password_hash("admin123"),
-                phone="+8801000000000",
-                role="admin"
-            )
-            db.add(admin_user)
-            db.commit()
-            
-    except Exception as e:
-        print(f"Startup error: {e}")
-    finally:
-        db.close()
-
 if __name__ == "__main__":
+    # Development server with auto-reload; production runs python serve.py
     import uvicorn
     port = int(os.getenv("PORT", 8000))
     uvicorn.run(
@@ -1,21 +1,131 @@
 from datetime import datetime, timedelta
 from typing import Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 import models
+from database import get_db
+import asyncio
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
+import threading
+import time
 
 # Security configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 300))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 2))
+LOGIN_QUEUE_LIMIT = int(os.getenv("LOGIN_QUEUE_LIMIT", 64))
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+
+router = APIRouter(tags=["auth"])
+
+class UserPrincipal:
+    __slots__ = ("id", "email", "role", "name")
+
+    def __init__(self, id, email, role, name=None):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.name = name
+
+class PrincipalCache:
+    """Per-process cache of verified tokens to user snapshots.
+
+    Entries live until the token's own exp or PRINCIPAL_CACHE_TTL_SECONDS,
+    whichever comes first, so changes made by other workers are picked up
+    within that bound. Changes made through this process are invalidated
+    immediately: ORM flushes by the User mapper events below, bulk
+    update()/delete() statements on User by clearing the cache. Core
+    statements on the users table bypass both and must call
+    invalidate_user() themselves.
+    """
+
+    def __init__(self, max_entries=PRINCIPAL_CACHE_SIZE, ttl_seconds=PRINCIPAL_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._tokens_by_user = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, token: str):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, token: str, principal: UserPrincipal, token_exp: float):
+        expires_at = min(token_exp, time.time() + self.ttl_seconds)
+        with self._lock:
+            self._entries[token] = (principal, expires_at)
+            self._entries.move_to_end(token)
+            self._tokens_by_user.setdefault(principal.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, token: str):
+        principal, _ = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(principal.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[principal.id]
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+principal_cache = PrincipalCache()
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def invalidate_cached_principal(mapper, connection, target):
+    principal_cache.invalidate_user(target.id)
+
+@event.listens_for(Session, "do_orm_execute")
+def invalidate_principals_on_bulk_change(orm_execute_state):
+    # Bulk UPDATE/DELETE skips the mapper events and doesn't say which rows
+    # it touched, so drop every cached principal
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if any(mapper.class_ is models.User for mapper in orm_execute_state.all_mappers):
+        principal_cache.clear()
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -23,6 +133,48 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# bcrypt is deliberately slow and releases the GIL, so it runs on its own
+# bounded pool instead of the event loop or Starlette's shared threadpool
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+async def verify_password_async(plain_password, hashed_password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, get_password_hash, password)
+
+class LoginAdmission:
+    """Caps the number of password checks queued or running at once.
+
+    Requests over the limit are rejected straight away with 503 and a
+    Retry-After hint rather than waiting behind a long bcrypt queue.
+    """
+
+    def __init__(self, limit=LOGIN_QUEUE_LIMIT):
+        self.limit = limit
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def __enter__(self):
+        if self.in_flight >= self.limit:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many login attempts in progress, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        self.in_flight += 1
+        self.admitted += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.in_flight -= 1
+
+login_admission = LoginAdmission()
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -41,7 +193,31 @@ def authenticate_user(db: Session, email: str, password: str):
         return False
     return user
 
-def get_current_user(db: Session, token: str):
+async def authenticate_user_async(db: Session, email: str, password: str):
+    user = db.query(models.User).filter(models.User.email == email).first()
+    # Hand the connection back to the pool before the slow bcrypt check
+    db.close()
+    if not user:
+        return False
+    if not await verify_password_async(password, user.password):
+        return False
+    return user
+
+def serialize_user(user):
+    return {
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "phone": user.phone,
+        "address": user.address,
+        "role": user.role
+    }
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -58,4 +234,80 @@ def get_current_user(db: Session, token: str):
     user = db.query(models.User).filter(models.User.email == email).first()
     if user is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+    
+    principal = UserPrincipal(id=user.id, email=user.email, role=user.role, name=user.name)
+    principal_cache.set(token, principal, payload.get("exp") or float("inf"))
+    return principal
+
+def require_admin(current_user: UserPrincipal = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+    return current_user
+
+@router.post("/register")
+async def register(user_data: dict, db: Session = Depends(get_db)):
+    for field in ("name", "email", "password", "phone"):
+        if not user_data.get(field):
+            raise HTTPException(status_code=400, detail=f"{field} is required")
+    
+    if db.query(models.User).filter(models.User.email == user_data["email"]).first():
+        raise HTTPException(status_code=400, detail="Email already registered")
+    db.close()
+    
+    with login_admission:
+        hashed_password = await get_password_hash_async(user_data["password"])
+    
+    user = models.User(
+        name=user_data["name"],
+        email=user_data["email"],
+        password=hashed_password,
+        phone=user_data["phone"],
+        address=user_data.get("address")
+    )
+    
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    
+    return {
+        "message": "User registered successfully",
+        "user": serialize_user(user)
+    }
+
+@router.post("/login")
+async def login(login_data: dict, db: Session = Depends(get_db)):
+    with login_admission:
+        user = await authenticate_user_async(db, login_data.get("email"), login_data.get("password") or "")
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return {
+        "token": create_access_token({"sub": user.email}),
+        "token_type": "bearer",
+        "user": serialize_user(user)
+    }
+
+@router.get("/login-admission/stats")
+def get_login_admission_stats(current_user: UserPrincipal = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    return {
+        "limit": login_admission.limit,
+        "in_flight": login_admission.in_flight,
+        "admitted": login_admission.admitted,
+        "rejected": login_admission.rejected,
+        "workers": PASSWORD_HASH_WORKERS
+    }
+
+@router.get("/principal-cache/stats")
+def get_principal_cache_stats(current_user: UserPrincipal = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    return principal_cache.stats()
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""Checkout throughput benchmark for order_routes.create_order.
+
+Seeds a catalog, then has many concurrent buyers each place orders with
+large carts and reports orders/sec, line items/sec and latency percentiles.
+
+    python benchmarks/checkout_benchmark.py --buyers 32 --orders 20 --lines 50
+
+Uses a throwaway SQLite file unless BENCH_DATABASE_URL is set.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+import models
+from order_routes import create_order
+
+def make_engine():
+    url = os.getenv("BENCH_DATABASE_URL")
+    if url:
+        return create_engine(url, pool_size=64, max_overflow=0)
+
+    path = os.path.join(tempfile.mkdtemp(), "checkout_bench.db")
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False, "timeout": 60},
+        pool_size=64,
+        max_overflow=0
+    )
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    return engine
+
+def seed(engine, catalog_size, buyers):
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Medicine), [
+            {"name": f"Medicine {i}", "price": 10.0 + i % 90, "stock": 10_000_000, "category": "tablet"}
+            for i in range(catalog_size)
+        ])
+        conn.execute(insert(models.User), [
+            {"name": f"Buyer {i}", "email": f"buyer{i}@bench.local", "password": "x", "phone": "0"}
+            for i in range(buyers)
+        ])
+
+def buyer(Session, user_id, orders, lines, catalog_size, latencies, failures):
+    rng = random.Random(user_id)
+    user = SimpleNamespace(id=user_id)
+    for _ in range(orders):
+        cart = [
+            {"medicine_id": medicine_id, "quantity": rng.randint(1, 3)}
+            for medicine_id in rng.sample(range(1, catalog_size + 1), lines)
+        ]
+        db = Session()
+        started = time.perf_counter()
+        try:
+            create_order({"items": cart, "shipping_address": "bench"}, db=db, current_user=user)
+            latencies.append(time.perf_counter() - started)
+        except HTTPException:
+            failures.append(1)
+        finally:
+            db.close()
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--buyers", type=int, default=32)
+    parser.add_argument("--orders", type=int, default=20, help="orders per buyer")
+    parser.add_argument("--lines", type=int, default=50, help="cart lines per order")
+    parser.add_argument("--catalog", type=int, default=2000)
+    args = parser.parse_args()
+
+    engine = make_engine()
+    seed(engine, args.catalog, args.buyers)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    latencies, failures = [], []
+    threads = [
+        threading.Thread(
+            target=buyer,
+            args=(Session, user_id, args.orders, args.lines, args.catalog, latencies, failures)
+        )
+        for user_id in range(1, args.buyers + 1)
+    ]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    completed = len(latencies)
+    print(f"dialect:      {engine.dialect.name}")
+    print(f"buyers:       {args.buyers} x {args.orders} orders x {args.lines} lines")
+    print(f"completed:    {completed} orders, {len(failures)} rejected, {elapsed:.2f}s")
+    print(f"throughput:   {completed / elapsed:.1f} orders/s, {completed * args.lines / elapsed:.0f} lines/s")
+    if latencies:
+        print(f"latency ms:   p50={statistics.median(latencies) * 1000:.1f} "
+              f"p95={percentile(latencies, 95) * 1000:.1f} p99={percentile(latencies, 99) * 1000:.1f}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,138 @@
+"""Catalog read benchmark: sync threadpool sessions vs the async engine.
+
+Runs the same concurrent mix of catalog browse and medicine detail
+requests against the app once with DATABASE_ASYNC off and once with it on,
+each in a fresh process with its own seeded SQLite file, and prints
+requests/sec and latency percentiles per mode. The catalog cache is
+disabled so every request reaches the database.
+
+    python benchmarks/db_mode_benchmark.py --requests 3000 --concurrency 64
+
+Set BENCH_DATABASE_URL to benchmark a PostgreSQL database instead (it is
+seeded and reused by both runs).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def seed(catalog_size):
+    import manage
+    from sqlalchemy import delete, insert
+    import models
+    from database import engine
+
+    manage.init_db()
+    with engine.begin() as conn:
+        conn.execute(delete(models.Medicine))
+        conn.execute(insert(models.Medicine), [
+            {
+                "sku": f"BENCH-{i}", "name": f"Medicine {i:05d}", "price": 10.0 + i % 90,
+                "category": ("tablet", "syrup", "capsule")[i % 3], "stock": 100,
+                "manufacturer": "Bench", "requires_prescription": False, "is_featured": i % 50 == 0
+            }
+            for i in range(catalog_size)
+        ])
+    with engine.connect() as conn:
+        return [row.id for row in conn.execute(models.Medicine.__table__.select().with_only_columns(models.Medicine.id))]
+
+async def drive(args, medicine_ids):
+    import anyio.to_thread
+    import httpx
+    from app import app
+
+    anyio.to_thread.current_default_thread_limiter().total_tokens = args.threads
+    rng = random.Random(0)
+    paths = []
+    for _ in range(args.requests):
+        roll = rng.random()
+        if roll < 0.5:
+            paths.append(("detail", f"/api/medicines/{rng.choice(medicine_ids)}"))
+        elif roll < 0.8:
+            paths.append(("browse", f"/api/medicines/?limit=20&skip={rng.randrange(0, len(medicine_ids) - 20)}"))
+        else:
+            paths.append(("category", "/api/medicines/?limit=20&category=syrup"))
+
+    latencies = {}
+    semaphore = asyncio.Semaphore(args.concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def call(kind, path):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.setdefault(kind, []).append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(call(kind, path) for kind, path in paths))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": args.requests,
+        "elapsed": elapsed,
+        "routes": {
+            kind: {
+                "p50": statistics.median(values),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+            }
+            for kind, values in latencies.items()
+        }
+    }
+
+def run_child(args):
+    # One mode per process: database.py reads its configuration at import
+    work_dir = tempfile.mkdtemp()
+    os.chdir(work_dir)
+    os.makedirs("uploads", exist_ok=True)
+    os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+    os.environ["DATABASE_ASYNC"] = "true" if args.child == "async" else "false"
+    os.environ["CATALOG_CACHE_SIZE"] = "0"
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    sys.path.insert(0, BACKEND_DIR)
+
+    medicine_ids = seed(args.catalog)
+    print(json.dumps(asyncio.run(drive(args, medicine_ids))))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=40, help="threadpool size (Starlette's default is 40)")
+    parser.add_argument("--catalog", type=int, default=5000)
+    parser.add_argument("--child", choices=["sync", "async"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    for mode in ("sync", "async"):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", mode,
+             "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+             "--threads", str(args.threads), "--catalog", str(args.catalog)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:>5}: {result['requests'] / result['elapsed']:.0f} req/s "
+              f"({result['requests']} requests at concurrency {args.concurrency}, {args.threads} threads)")
+        for kind, stats in sorted(result["routes"].items()):
+            print(f"       {kind:<9} p50={stats['p50'] * 1000:.1f}ms "
+                  f"p95={stats['p95'] * 1000:.1f}ms p99={stats['p99'] * 1000:.1f}ms")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""Local stand-in for the Groq chat completions API.
+
+Answers POST /openai/v1/chat/completions the way Groq does, both the JSON
+and the streamed (SSE) forms, after a configurable delay, so load tests
+exercise the AI routes without network access or an API key. Point the
+app at it with GROQ_BASE_URL=http://127.0.0.1:<port>.
+
+    python benchmarks/fake_groq.py --port 8900 --latency 0.4 --token-delay 0.02
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+ANSWER = (
+    "Thanks for asking MediCart. You can find that medicine in our catalog, "
+    "and prescription items need a valid prescription uploaded before checkout. "
+    "Please consult your pharmacist for dosage advice."
+)
+
+def create_app(latency: float = 0.4, token_delay: float = 0.02):
+    """latency is the time to the first token; token_delay the gap between tokens."""
+    app = FastAPI()
+    app.state.requests = 0
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        model = body.get("model", "fake")
+        tokens = [word + " " for word in ANSWER.split()][:body.get("max_tokens") or None]
+
+        await asyncio.sleep(latency)
+        if not body.get("stream"):
+            await asyncio.sleep(token_delay * len(tokens))
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)}
+            })
+
+        async def stream():
+            for index, token in enumerate(tokens):
+                if index:
+                    await asyncio.sleep(token_delay)
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": app.state.requests}
+
+    return app
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.4, help="seconds to the first token")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="seconds between tokens")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency, args.token_delay), host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,389 @@
+"""Offline load test for the MediCart API.
+
+Seeds a database, boots `app:app` under uvicorn with Groq pointed at
+benchmarks/fake_groq.py, then replays a weighted traffic mix for a fixed
+duration and reports throughput and p50/p95/p99 latency per scenario:
+
+    browse, search, detail   catalog reads
+    login                    bcrypt-bound auth
+    checkout                 order_routes.create_order with a small cart
+    upload                   prescription image upload
+    ai_chat, ai_stream       the AI assistant through the fake Groq server
+
+Results can be saved as a named baseline and later runs diffed against it:
+
+    python benchmarks/loadtest.py --duration 30 --save-baseline main
+    python benchmarks/loadtest.py --duration 30 --compare main --max-regression 15
+
+Uses a throwaway SQLite file unless BENCH_DATABASE_URL is set. Nothing
+leaves the machine.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+BASELINE_DIR = os.path.join(BENCH_DIR, "baselines")
+sys.path.insert(0, BENCH_DIR)
+
+PASSWORD = "loadtest-password"
+SEARCH_TERMS = ["napa", "para", "amox", "cef", "vita", "omep", "medicine 12", "syrup", "levo"]
+AI_QUESTIONS = [
+    "Do you have paracetamol in stock?",
+    "How do I upload a prescription?",
+    "What are your opening hours?",
+    "Is delivery available today?",
+    "Can I take ibuprofen with food?",
+    "What is the price of Napa?",
+    "How long does shipping take?",
+    "Do I need a prescription for antibiotics?",
+]
+DEFAULT_MIX = {
+    "browse": 25, "search": 15, "detail": 15, "login": 3,
+    "checkout": 10, "upload": 4, "ai_chat": 14, "ai_stream": 14,
+}
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def parse_mix(text):
+    mix = dict(DEFAULT_MIX)
+    for part in filter(None, (text or "").split(",")):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"unknown scenario {name!r}; choose from {', '.join(DEFAULT_MIX)}")
+        mix[name] = float(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+def seed(catalog_size, users):
+    # Imported late: database.py reads DATABASE_URL at import
+    import manage
+    import models
+    from auth import get_password_hash
+    from database import engine
+    from sqlalchemy import insert
+
+    manage.init_db()
+    manage.seed()
+    password_hash = get_password_hash(PASSWORD)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Medicine), [
+            {
+                "sku": f"LOAD-{i}", "name": f"Medicine {i:05d}", "description": "Load test item",
+                "price": 5.0 + i % 200, "category": ("tablet", "syrup", "capsule")[i % 3],
+                "manufacturer": ("Beximco", "Square", "Incepta", "Renata")[i % 4],
+                "stock": 10_000_000, "requires_prescription": i % 7 == 0, "is_featured": i % 100 == 0
+            }
+            for i in range(catalog_size)
+        ])
+        conn.execute(insert(models.User), [
+            {"name": f"Load {i}", "email": f"load{i}@bench.local", "password": password_hash, "phone": "0"}
+            for i in range(users)
+        ])
+    with engine.connect() as conn:
+        return [
+            row.id for row in conn.execute(
+                models.Medicine.__table__.select()
+                .with_only_columns(models.Medicine.id)
+                .where(models.Medicine.requires_prescription == False)
+            )
+        ]
+
+def prescription_images(count):
+    from PIL import Image
+    images = []
+    for i in range(count):
+        buffer = io.BytesIO()
+        Image.new("RGB", (640, 480), ((i * 37) % 256, (i * 91) % 256, 200)).save(buffer, "PNG")
+        images.append(buffer.getvalue())
+    return images
+
+def start_fake_groq(port, latency, token_delay):
+    import uvicorn
+    from fake_groq import create_app
+
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(latency, token_delay), host="127.0.0.1", port=port, log_level="warning"
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    return server
+
+def start_api(port, workers, env, work_dir):
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--app-dir", BACKEND_DIR,
+         "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=work_dir, env=env
+    )
+
+async def wait_until_ready(client, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"API server exited with {process.returncode}")
+        try:
+            if (await client.get("/api/health")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise SystemExit("API server did not become ready")
+
+class Scenarios:
+    def __init__(self, client, rng, medicine_ids, tokens, images, users):
+        self.client = client
+        self.rng = rng
+        self.medicine_ids = medicine_ids
+        self.tokens = tokens
+        self.images = images
+        self.users = users
+
+    def auth(self):
+        return {"Authorization": f"Bearer {self.rng.choice(self.tokens)}"}
+
+    async def browse(self):
+        category = self.rng.choice([None, "tablet", "syrup", "capsule"])
+        params = {"limit": 20, "fields": "id,name,price,manufacturer,image_url,requires_prescription"}
+        if category:
+            params["category"] = category
+        return await self.client.get("/api/medicines/", params=params)
+
+    async def search(self):
+        return await self.client.get("/api/medicines/", params={"search": self.rng.choice(SEARCH_TERMS), "limit": 20})
+
+    async def detail(self):
+        return await self.client.get(f"/api/medicines/{self.rng.choice(self.medicine_ids)}")
+
+    async def login(self):
+        email = f"load{self.rng.randrange(self.users)}@bench.local"
+        return await self.client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+
+    async def checkout(self):
+        items = [
+            {"medicine_id": medicine_id, "quantity": self.rng.randint(1, 3)}
+            for medicine_id in self.rng.sample(self.medicine_ids, self.rng.randint(1, 5))
+        ]
+        return await self.client.post(
+            "/api/orders/", json={"items": items, "shipping_address": "Load test"}, headers=self.auth()
+        )
+
+    async def upload(self):
+        files = {"file": ("prescription.png", self.rng.choice(self.images), "image/png")}
+        return await self.client.post("/api/prescriptions/upload", files=files, headers=self.auth())
+
+    async def ai_chat(self):
+        return await self.client.post("/api/ai/chat", json={"message": self.rng.choice(AI_QUESTIONS)})
+
+    async def ai_stream(self):
+        async with self.client.stream(
+            "POST", "/api/ai/chat/stream", json={"message": self.rng.choice(AI_QUESTIONS)}
+        ) as response:
+            async for _ in response.aiter_bytes():
+                pass
+            return response
+
+async def run_load(args, base_url, medicine_ids, images):
+    import httpx
+
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        tokens = []
+        for i in range(min(args.users, 8)):
+            response = await client.post("/api/auth/login", json={"email": f"load{i}@bench.local", "password": PASSWORD})
+            response.raise_for_status()
+            tokens.append(response.json()["token"])
+
+        async def worker(worker_id, deadline, record):
+            rng = random.Random(args.seed * 1000 + worker_id)
+            scenarios = Scenarios(client, rng, medicine_ids, tokens, images, args.users)
+            while time.monotonic() < deadline:
+                name = rng.choices(names, weights)[0]
+                started = time.perf_counter()
+                try:
+                    response = await getattr(scenarios, name)()
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                if record:
+                    latencies[name].append(time.perf_counter() - started)
+                    errors[name] += not ok
+
+        if args.warmup:
+            deadline = time.monotonic() + args.warmup
+            await asyncio.gather(*(worker(i, deadline, False) for i in range(args.concurrency)))
+
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(*(worker(i, deadline, True) for i in range(args.concurrency)))
+        elapsed = time.monotonic() - started
+
+    def summarize(values, error_count):
+        if not values:
+            return {"count": 0, "errors": error_count, "rps": 0.0, "p50": None, "p95": None, "p99": None}
+        return {
+            "count": len(values),
+            "errors": error_count,
+            "rps": len(values) / elapsed,
+            "p50": statistics.median(values) * 1000,
+            "p95": percentile(values, 95) * 1000,
+            "p99": percentile(values, 99) * 1000,
+        }
+
+    every = [value for values in latencies.values() for value in values]
+    return {
+        "config": {
+            "database": args.database_kind, "duration": args.duration, "concurrency": args.concurrency,
+            "workers": args.workers, "catalog": args.catalog, "mix": mix,
+            "groq_latency": args.groq_latency, "groq_token_delay": args.groq_token_delay,
+        },
+        "elapsed": elapsed,
+        "total": summarize(every, sum(errors.values())),
+        "routes": {name: summarize(latencies[name], errors[name]) for name in names},
+    }
+
+def format_ms(value):
+    return "-" if value is None else f"{value:.1f}"
+
+def print_report(results, baseline=None):
+    header = f"{'scenario':<10} {'count':>7} {'err':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    if baseline:
+        header += f"  {'Δrps':>7} {'Δp50':>7} {'Δp95':>7} {'Δp99':>7}"
+    print(header)
+    rows = list(results["routes"].items()) + [("TOTAL", results["total"])]
+    for name, stats in rows:
+        line = (f"{name:<10} {stats['count']:>7} {stats['errors']:>5} {stats['rps']:>8.1f} "
+                f"{format_ms(stats['p50']):>9} {format_ms(stats['p95']):>9} {format_ms(stats['p99']):>9}")
+        if baseline:
+            before = baseline["total"] if name == "TOTAL" else baseline["routes"].get(name)
+            line += "  " + " ".join(f"{change(before, stats, key):>7}" for key in ("rps", "p50", "p95", "p99"))
+        print(line)
+
+def change(before, after, key):
+    if not before or not before.get(key) or after.get(key) is None:
+        return "-"
+    return f"{(after[key] - before[key]) / before[key] * 100:+.0f}%"
+
+def regressions(results, baseline, threshold):
+    # Slower percentiles or lower throughput beyond threshold percent
+    found = []
+    for name, stats in list(results["routes"].items()) + [("TOTAL", results["total"])]:
+        before = baseline["total"] if name == "TOTAL" else baseline["routes"].get(name)
+        if not before or not before["count"] or not stats["count"]:
+            continue
+        for key in ("p50", "p95", "p99"):
+            if stats[key] > before[key] * (1 + threshold / 100):
+                found.append(f"{name} {key} {before[key]:.1f}ms -> {stats[key]:.1f}ms")
+        if stats["rps"] < before["rps"] * (1 - threshold / 100):
+            found.append(f"{name} rps {before['rps']:.1f} -> {stats['rps']:.1f}")
+    return found
+
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="unmeasured seconds before the run")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent virtual users")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--catalog", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--mix", help="override scenario weights, e.g. login=0,ai_chat=30")
+    parser.add_argument("--groq-latency", type=float, default=0.4, help="fake Groq time to first token")
+    parser.add_argument("--groq-token-delay", type=float, default=0.02, help="fake Groq delay between tokens")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME", help="diff against a saved baseline")
+    parser.add_argument("--max-regression", type=float, metavar="PCT",
+                        help="with --compare, exit 1 if any scenario regresses by more than PCT percent")
+    parser.add_argument("--json", metavar="PATH", help="also write the raw results here")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(baseline_path(args.compare)) as f:
+            baseline = json.load(f)
+
+    work_dir = tempfile.mkdtemp(prefix="medicart-load-")
+    os.chdir(work_dir)
+    os.makedirs("uploads", exist_ok=True)
+    database_url = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{os.path.join(work_dir, 'load.db')}"
+    args.database_kind = database_url.split(":", 1)[0]
+    groq_port, api_port = free_port(), free_port()
+
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        GROQ_API_KEY="offline",
+        GROQ_BASE_URL=f"http://127.0.0.1:{groq_port}",
+        PYTHONPATH=BACKEND_DIR,
+        NO_PROXY="127.0.0.1,localhost",
+    )
+    os.environ.update(env)
+    sys.path.insert(0, BACKEND_DIR)
+
+    print(f"seeding {args.catalog} medicines and {args.users} users ({args.database_kind})", file=sys.stderr)
+    medicine_ids = seed(args.catalog, args.users)
+    images = prescription_images(16)
+
+    fake_groq = start_fake_groq(groq_port, args.groq_latency, args.groq_token_delay)
+    api = start_api(api_port, args.workers, env, work_dir)
+    base_url = f"http://127.0.0.1:{api_port}"
+    try:
+        import httpx
+
+        async def ready():
+            async with httpx.AsyncClient(base_url=base_url) as client:
+                await wait_until_ready(client, api)
+
+        asyncio.run(ready())
+        print(f"running {args.duration:.0f}s at concurrency {args.concurrency}", file=sys.stderr)
+        results = asyncio.run(run_load(args, base_url, medicine_ids, images))
+    finally:
+        api.terminate()
+        api.wait(timeout=30)
+
+    results["groq_completions"] = fake_groq.config.app.state.requests
+    print(f"fake Groq served {results['groq_completions']} completions "
+          "(the rest were answered from the AI response cache)", file=sys.stderr)
+    print_report(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path(args.save_baseline), "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"saved baseline {baseline_path(args.save_baseline)}")
+
+    if baseline and args.max_regression is not None:
+        found = regressions(results, baseline, args.max_regression)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""Login burst benchmark for the auth router.
+
+Fires a burst of concurrent logins at the app in-process while a probe
+keeps calling /api/health, then reports logins/sec, shed logins and the
+probe's latency percentiles. A healthy run keeps the probe p99 in the low
+milliseconds even while bcrypt is saturated.
+
+    python benchmarks/login_benchmark.py --logins 200 --concurrency 100
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORK_DIR = tempfile.mkdtemp()
+os.chdir(WORK_DIR)
+os.makedirs("uploads", exist_ok=True)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(WORK_DIR, 'login_bench.db')}")
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+import httpx
+import models
+from app import app
+from auth import get_password_hash, login_admission
+from database import SessionLocal
+
+EMAIL = "bench@medicart.local"
+PASSWORD = "bench-password"
+
+def seed_user():
+    db = SessionLocal()
+    try:
+        db.add(models.User(name="Bench", email=EMAIL, password=get_password_hash(PASSWORD), phone="0"))
+        db.commit()
+    finally:
+        db.close()
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+async def run(args):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(args.concurrency)
+        statuses = []
+        probe_latencies = []
+        done = asyncio.Event()
+
+        async def login():
+            async with semaphore:
+                response = await client.post("/api/auth/login", json={"email": EMAIL, "password": PASSWORD})
+                statuses.append(response.status_code)
+
+        async def probe():
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/api/health")
+                probe_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.005)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(args.logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    succeeded = statuses.count(200)
+    print(f"logins:       {args.logins} at concurrency {args.concurrency} in {elapsed:.2f}s")
+    print(f"succeeded:    {succeeded} ({succeeded / elapsed:.1f} logins/s)")
+    print(f"shed (503):   {statuses.count(503)} (queue limit {login_admission.limit})")
+    if probe_latencies:
+        print(f"/api/health:  {len(probe_latencies)} probes, "
+              f"p50={statistics.median(probe_latencies) * 1000:.2f}ms "
+              f"p99={percentile(probe_latencies, 99) * 1000:.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=SessionLocal.kw["bind"])
+    seed_user()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""Response serialization cost for a catalog page, before and after schemas.
+
+Loads a page of medicines as ORM instances from a seeded SQLite file and
+times the three ways the API has turned them into JSON:
+
+  jsonable_encoder  FastAPI's reflective encoder + json.dumps (returning ORM
+                    objects with no response_model, as the routes used to)
+  response_model    pydantic validation from attributes + orjson
+                    (what routes with a response_model and ORJSONResponse do)
+  dump_json         TypeAdapter.dump_json straight to bytes (the catalog
+                    cache path)
+
+    python benchmarks/serialization_benchmark.py --items 1000 --repeat 50
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_page(items):
+    work_dir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+    sys.path.insert(0, BACKEND_DIR)
+    from sqlalchemy import insert
+    import models
+    from database import Base, engine, SessionLocal
+
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Medicine), [
+            {
+                "sku": f"BENCH-{i}", "name": f"Medicine {i:05d}", "price": 10.0 + i % 90,
+                "description": "Film-coated tablet for the relief of mild to moderate pain and fever.",
+                "category": ("tablet", "syrup", "capsule")[i % 3], "stock": 100, "manufacturer": "Bench",
+                "requires_prescription": i % 4 == 0, "is_featured": i % 50 == 0,
+                "image_url": f"/uploads/medicines/{i}.webp"
+            }
+            for i in range(items)
+        ])
+    db = SessionLocal()
+    return db.query(models.Medicine).order_by(models.Medicine.name, models.Medicine.id).all()
+
+def time_it(function, repeat):
+    function()  # warm up caches and lazy imports
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    medicines = load_page(args.items)
+
+    from typing import List
+    import orjson
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    import schemas
+
+    adapter = TypeAdapter(List[schemas.Medicine])
+
+    def before():
+        return json.dumps(jsonable_encoder(medicines), ensure_ascii=False, allow_nan=False,
+                          separators=(",", ":")).encode()
+
+    def response_model():
+        return orjson.dumps(adapter.dump_python(adapter.validate_python(medicines), mode="json"))
+
+    def dump_json():
+        return adapter.dump_json(adapter.validate_python(medicines))
+
+    assert json.loads(before()) == json.loads(response_model()) == json.loads(dump_json())
+
+    baseline = time_it(before, args.repeat)
+    print(f"{args.items} medicines, median of {args.repeat} runs")
+    for name, function in (("jsonable_encoder", before), ("response_model", response_model), ("dump_json", dump_json)):
+        seconds = baseline if function is before else time_it(function, args.repeat)
+        print(f"  {name:<17} {seconds * 1000:7.2f} ms  ({baseline / seconds:4.1f}x)")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
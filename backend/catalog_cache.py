@@ -0,0 +1,149 @@
+from collections import OrderedDict
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+import hashlib
+import orjson
+import os
+import threading
+import time
+
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", 4096))
+# Writes made by other workers (or manage.py) are only seen after this
+CATALOG_CACHE_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", 30))
+FEATURED_TAG = "featured"
+
+def medicine_tag(medicine_id: int):
+    return f"medicine:{medicine_id}"
+
+class CachedBody:
+    __slots__ = ("body", "etag", "tags", "expires_at")
+
+    def __init__(self, body, etag, tags, expires_at):
+        self.body = body
+        self.etag = etag
+        self.tags = tags
+        self.expires_at = expires_at
+
+class CatalogCache:
+    """Read-through cache of serialized catalog responses.
+
+    Each entry holds the encoded JSON body and its strong ETag and is
+    tagged with the medicines it contains, so a write only evicts the
+    responses that include the changed rows.
+    """
+
+    def __init__(self, max_entries=CATALOG_CACHE_SIZE, ttl_seconds=CATALOG_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._keys_by_tag = {}
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= now:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key: str, body: bytes, tags, loaded_at_version: int = None):
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        entry = CachedBody(body, etag, frozenset(tags), time.monotonic() + self.ttl_seconds)
+        with self._lock:
+            # A write landed while this body was being loaded; serve it once
+            # but don't keep it, it may predate that write
+            if loaded_at_version is not None and loaded_at_version != self.version:
+                return entry
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            for tag in entry.tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+        return entry
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def invalidate(self, tags):
+        with self._lock:
+            self.version += 1
+            for tag in tags:
+                for key in list(self._keys_by_tag.get(tag, ())):
+                    self._remove(key)
+
+    def add_listener(self, callback):
+        """callback(medicine_ids) runs after every medicine invalidation."""
+        self._listeners.append(callback)
+
+    def invalidate_medicines(self, medicine_ids, featured: bool = False):
+        medicine_ids = list(medicine_ids)
+        tags = [medicine_tag(medicine_id) for medicine_id in medicine_ids]
+        if featured:
+            tags.append(FEATURED_TAG)
+        self.invalidate(tags)
+        for callback in self._listeners:
+            callback(medicine_ids)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            self._keys_by_tag.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+catalog_cache = CatalogCache()
+
+def etag_matches(request: Request, etag: str):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [value.strip() for value in header.split(",")]
+
+async def cached_response(request: Request, key: str, loader, tags_for, adapter=None):
+    """Serve key from the catalog cache, loading and encoding it on a miss.
+
+    await loader() returns the payload; tags_for(payload) returns the tags that
+    should evict it. adapter, a pydantic TypeAdapter for the response schema,
+    encodes ORM payloads. Answers If-None-Match with 304 when the ETag matches.
+    """
+    entry = catalog_cache.get(key)
+    if entry is None:
+        version = catalog_cache.version
+        payload = await loader()
+        if adapter is not None:
+            body = adapter.dump_json(adapter.validate_python(payload))
+        else:
+            body = orjson.dumps(jsonable_encoder(payload))
+        entry = catalog_cache.set(key, body, tags_for(payload), version)
+
+    headers = {"ETag": entry.etag, "Cache-Control": "public, max-age=0, must-revalidate"}
+    if etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
\ No newline at end of file
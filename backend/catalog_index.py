@@ -0,0 +1,296 @@
+"""In-memory BM25 index over the medicine catalog for grounding AI answers.
+
+The index keeps one posting list per term (name, category, manufacturer
+and description words) plus the live price, stock and prescription flag
+of every medicine, so the AI routes can put accurate catalog facts into
+the prompt without a database round trip per question. Lookups score
+NumPy arrays of the matching postings only and stay around a millisecond
+on six-figure catalogs.
+
+Writes through the API mark the touched medicines dirty (via the catalog
+cache's invalidation hook) and the next lookup re-reads just those rows;
+stock and price changes don't touch the postings at all. A full rebuild
+runs every CATALOG_INDEX_REFRESH_SECONDS to pick up writes made by other
+workers or manage.py.
+"""
+from sqlalchemy import select
+import math
+import numpy as np
+import os
+import re
+import threading
+import time
+import models
+from database import SessionLocal
+
+CATALOG_INDEX_REFRESH_SECONDS = float(os.getenv("CATALOG_INDEX_REFRESH_SECONDS", 300))
+# After a failed refresh, requests keep the current index this long before
+# trying the database again
+CATALOG_INDEX_RETRY_SECONDS = float(os.getenv("CATALOG_INDEX_RETRY_SECONDS", 10))
+K1 = 1.2
+B = 0.75
+NAME_WEIGHT = 3  # name terms count this many times toward term frequency
+MIN_PREFIX = 4
+PREFIX_WEIGHT = 0.5
+MAX_PREFIX_EXPANSIONS = 16
+
+STOP_WORDS = frozenset(
+    "a an and any are as at be can do does for from have how i in is it me my of on or "
+    "the there this to what which with you your much price cost stock available".split()
+)
+
+INDEX_COLUMNS = [
+    models.Medicine.id, models.Medicine.name, models.Medicine.category, models.Medicine.manufacturer,
+    models.Medicine.description, models.Medicine.price, models.Medicine.stock,
+    models.Medicine.requires_prescription,
+]
+
+def tokenize(text):
+    return re.findall(r"\w+", (text or "").lower())
+
+class IndexedMedicine:
+    __slots__ = ("slot", "text", "terms", "length", "summary")
+
+    def __init__(self, slot, text, terms, length, summary):
+        self.slot = slot
+        self.text = text
+        self.terms = terms
+        self.length = length
+        self.summary = summary
+
+class CatalogIndex:
+    def __init__(self, refresh_seconds=CATALOG_INDEX_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._dirty = set()
+        self._loaded_at = None
+        self._failed_at = None
+        self._reset()
+        self.lookups = 0
+        self.full_builds = 0
+        self.incremental_updates = 0
+
+    def _reset(self):
+        self.medicines = {}         # medicine id -> IndexedMedicine
+        self.slot_ids = []          # slot -> medicine id (None when free)
+        self.free_slots = []
+        self.doc_lengths = np.zeros(1024, dtype=np.float32)
+        self.total_length = 0
+        self.postings = {}          # term -> {slot: term frequency}
+        self.prefixes = {}          # name-term prefix -> terms it expands to
+        self.name_terms = {}        # name term -> number of medicines whose name has it
+        self._compiled = {}         # term -> (slots, frequencies) arrays
+
+    def mark_dirty(self, medicine_ids):
+        with self._lock:
+            self._dirty.update(medicine_ids)
+
+    def ensure_fresh(self):
+        """Bring the index up to date; blocking, so call it off the event loop."""
+        stale = self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds
+        if not stale and not self._dirty:
+            return
+        if self._failed_at is not None and time.monotonic() - self._failed_at < CATALOG_INDEX_RETRY_SECONDS:
+            return
+        # One refresher at a time; others keep serving the current index
+        if not self._refresh_lock.acquire(blocking=self._loaded_at is None):
+            return
+        try:
+            db = SessionLocal()
+            try:
+                if stale:
+                    self._rebuild(db)
+                else:
+                    self._refresh_dirty(db)
+                self._failed_at = None
+            except Exception:
+                self._failed_at = time.monotonic()
+                raise
+            finally:
+                db.close()
+        finally:
+            self._refresh_lock.release()
+
+    def _rebuild(self, db):
+        with self._lock:
+            self._dirty.clear()
+        rows = db.execute(select(*INDEX_COLUMNS).execution_options(yield_per=5000))
+        fresh = CatalogIndex(self.refresh_seconds)
+        for row in rows:
+            fresh._upsert(row)
+        with self._lock:
+            for name in ("medicines", "slot_ids", "free_slots", "doc_lengths", "total_length",
+                         "postings", "prefixes", "name_terms", "_compiled"):
+                setattr(self, name, getattr(fresh, name))
+            self._loaded_at = time.monotonic()
+            self.full_builds += 1
+
+    def _refresh_dirty(self, db):
+        with self._lock:
+            medicine_ids, self._dirty = list(self._dirty), set()
+        try:
+            rows = {row.id: row for row in db.execute(select(*INDEX_COLUMNS).where(models.Medicine.id.in_(medicine_ids)))}
+        except Exception:
+            # Keep the ids for the next attempt
+            with self._lock:
+                self._dirty.update(medicine_ids)
+            raise
+        with self._lock:
+            for medicine_id in medicine_ids:
+                row = rows.get(medicine_id)
+                if row is None:
+                    self._remove(medicine_id)
+                else:
+                    self._upsert(row)
+            self.incremental_updates += 1
+
+    def _upsert(self, row):
+        summary = {
+            "id": row.id, "name": row.name, "category": row.category, "manufacturer": row.manufacturer,
+            "price": row.price, "stock": row.stock, "requires_prescription": bool(row.requires_prescription),
+        }
+        text = (row.name, row.category, row.manufacturer, row.description)
+        existing = self.medicines.get(row.id)
+        if existing is not None:
+            if existing.text == text:
+                # Stock and price updates leave the postings alone
+                existing.summary = summary
+                return
+            self._remove(row.id)
+
+        terms = {}
+        for term in tokenize(row.name):
+            terms[term] = terms.get(term, 0) + NAME_WEIGHT
+        for term in set(tokenize(row.name)):
+            self.name_terms[term] = self.name_terms.get(term, 0) + 1
+            if self.name_terms[term] == 1:
+                for end in range(MIN_PREFIX, len(term)):
+                    self.prefixes.setdefault(term[:end], set()).add(term)
+        for term in tokenize(row.category) + tokenize(row.manufacturer) + tokenize(row.description):
+            terms[term] = terms.get(term, 0) + 1
+
+        slot = self.free_slots.pop() if self.free_slots else len(self.slot_ids)
+        if slot == len(self.slot_ids):
+            self.slot_ids.append(row.id)
+            if slot >= len(self.doc_lengths):
+                self.doc_lengths = np.concatenate([self.doc_lengths, np.zeros(len(self.doc_lengths), dtype=np.float32)])
+        else:
+            self.slot_ids[slot] = row.id
+
+        length = sum(terms.values())
+        self.doc_lengths[slot] = length
+        self.total_length += length
+        for term, frequency in terms.items():
+            self.postings.setdefault(term, {})[slot] = frequency
+            self._compiled.pop(term, None)
+        self.medicines[row.id] = IndexedMedicine(slot, text, terms, length, summary)
+
+    def _remove(self, medicine_id):
+        medicine = self.medicines.pop(medicine_id, None)
+        if medicine is None:
+            return
+        for term in medicine.terms:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(medicine.slot, None)
+                if not postings:
+                    del self.postings[term]
+            self._compiled.pop(term, None)
+        # A name term stops expanding prefixes once no medicine's name has it
+        for term in set(tokenize(medicine.text[0])):
+            self.name_terms[term] -= 1
+            if self.name_terms[term]:
+                continue
+            del self.name_terms[term]
+            for end in range(MIN_PREFIX, len(term)):
+                expansions = self.prefixes.get(term[:end])
+                if expansions is not None:
+                    expansions.discard(term)
+                    if not expansions:
+                        del self.prefixes[term[:end]]
+        self.total_length -= medicine.length
+        self.doc_lengths[medicine.slot] = 0
+        self.slot_ids[medicine.slot] = None
+        self.free_slots.append(medicine.slot)
+
+    def _arrays(self, term):
+        compiled = self._compiled.get(term)
+        if compiled is None:
+            postings = self.postings[term]
+            compiled = self._compiled[term] = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float32, count=len(postings)),
+            )
+        return compiled
+
+    def _query_terms(self, query):
+        weights = {}
+        for term in tokenize(query):
+            if term in STOP_WORDS:
+                continue
+            if term in self.postings:
+                weights[term] = max(weights.get(term, 0), 1.0)
+            elif len(term) >= MIN_PREFIX:
+                # Partial names ("levo") match the terms they start
+                for expanded in list(self.prefixes.get(term, ()))[:MAX_PREFIX_EXPANSIONS]:
+                    if expanded in self.postings:
+                        weights[expanded] = max(weights.get(expanded, 0), PREFIX_WEIGHT)
+        return weights
+
+    def search(self, query: str, k: int = 5):
+        with self._lock:
+            self.lookups += 1
+            count = len(self.medicines)
+            terms = self._query_terms(query)
+            if not count or not terms:
+                return []
+
+            average_length = self.total_length / count
+            slot_parts, score_parts = [], []
+            for term, weight in terms.items():
+                slots, frequencies = self._arrays(term)
+                idf = math.log(1 + (count - len(slots) + 0.5) / (len(slots) + 0.5))
+                lengths = self.doc_lengths[slots]
+                scores = frequencies * (K1 + 1) / (frequencies + K1 * (1 - B + B * lengths / average_length))
+                slot_parts.append(slots)
+                score_parts.append(scores * (weight * idf))
+
+            slots, inverse = np.unique(np.concatenate(slot_parts), return_inverse=True)
+            totals = np.bincount(inverse, weights=np.concatenate(score_parts))
+            if len(totals) > k:
+                top = np.argpartition(-totals, k)[:k]
+            else:
+                top = np.arange(len(totals))
+            top = top[np.argsort(-totals[top], kind="stable")]
+            return [self.medicines[self.slot_ids[slots[index]]].summary for index in top]
+
+    def prompt_section(self, query: str, k: int = 5):
+        matches = self.search(query, k)
+        if not matches:
+            return None
+        lines = []
+        for medicine in matches:
+            details = ", ".join(filter(None, [medicine["category"], medicine["manufacturer"]]))
+            availability = f"{medicine['stock']} in stock" if medicine["stock"] else "out of stock"
+            prescription = "prescription required" if medicine["requires_prescription"] else "no prescription needed"
+            lines.append(
+                f"- {medicine['name']}{f' ({details})' if details else ''}: "
+                f"price {medicine['price']:.2f}, {availability}, {prescription}"
+            )
+        return "\n".join(lines)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "medicines": len(self.medicines),
+                "terms": len(self.postings),
+                "prefixes": len(self.prefixes),
+                "dirty": len(self._dirty),
+                "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+                "lookups": self.lookups,
+                "full_builds": self.full_builds,
+                "incremental_updates": self.incremental_updates
+            }
+
+catalog_index = CatalogIndex()
\ No newline at end of file
@@ -1,21 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from typing import List, Optional
 import models
+import schemas
 from database import get_db
-from auth import get_current_user
+from auth import get_current_user, UserPrincipal
+from events import event_broker
+from queue_routes import consultation_priority, ensure_not_claimed_by_other, release_claim
 
 router = APIRouter(prefix="/consultations", tags=["consultations"])
 
-@router.post("/")
+@router.post("/", response_model=schemas.ConsultationResult)
 def create_consultation(
     consultation_data: dict,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
+    category = consultation_data.get("category", "general")
     consultation = models.Consultation(
         user_id=current_user.id,
         question=consultation_data.get("question"),
-        category=consultation_data.get("category", "general")
+        category=category,
+        priority=consultation_priority(category)
     )
     
     db.add(consultation)
@@ -27,33 +33,42 @@ def create_consultation(
         "consultation": consultation
     }
 
-@router.get("/my-consultations")
+@router.get("/my-consultations", response_model=List[schemas.Consultation])
 def get_my_consultations(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     consultations = db.query(models.Consultation).filter(
         models.Consultation.user_id == current_user.id
     ).all()
     return consultations
 
-@router.get("/")
+@router.get("/", response_model=List[schemas.Consultation])
 def get_all_consultations(
+    status: Optional[str] = None,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=500),
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     if current_user.role not in ["admin", "pharmacist"]:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    consultations = db.query(models.Consultation).all()
+    # Pharmacists working through pending requests should use /api/queue
+    query = db.query(models.Consultation)
+    if status:
+        query = query.filter(models.Consultation.status == status)
+    consultations = query.order_by(
+        models.Consultation.created_at.desc(), models.Consultation.id.desc()
+    ).offset(skip).limit(limit).all()
     return consultations
 
-@router.put("/{consultation_id}/respond")
+@router.put("/{consultation_id}/respond", response_model=schemas.ConsultationResult)
 def respond_to_consultation(
     consultation_id: int,
     response_data: dict,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     if current_user.role not in ["admin", "pharmacist"]:
         raise HTTPException(status_code=403, detail="Access denied")
@@ -65,13 +80,21 @@ def respond_to_consultation(
     if not consultation:
         raise HTTPException(status_code=404, detail="Consultation not found")
     
+    ensure_not_claimed_by_other(consultation, current_user)
     consultation.response = response_data.get("response")
     consultation.pharmacist_id = current_user.id
     consultation.status = "answered"
+    release_claim(consultation)
     
     db.commit()
     db.refresh(consultation)
     
+    event_broker.publish(consultation.user_id, "consultation.answered", {
+        "id": consultation.id,
+        "status": consultation.status,
+        "response": consultation.response
+    })
+    
     return {
         "message": "Response submitted successfully",
         "consultation": consultation
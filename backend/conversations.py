@@ -0,0 +1,141 @@
+from collections import OrderedDict, deque
+import math
+import re
+import threading
+import time
+import uuid
+
+# Rough tokenizer-free estimate; Llama tokenizers average ~4 chars/token
+# on English text, which is close enough for budgeting
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def clip(text: str, max_tokens: int):
+    limit = max_tokens * CHARS_PER_TOKEN
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+def first_sentence(text: str):
+    match = re.match(r"(.+?[.!?])(\s|$)", text.strip(), re.S)
+    return match.group(1) if match else text.strip()
+
+class Turn:
+    __slots__ = ("user", "assistant", "tokens")
+
+    def __init__(self, user, assistant):
+        self.user = user
+        self.assistant = assistant
+        self.tokens = estimate_tokens(user) + estimate_tokens(assistant)
+
+class Conversation:
+    __slots__ = ("id", "turns", "history_tokens", "summary", "summary_tokens", "last_used")
+
+    def __init__(self, conversation_id):
+        self.id = conversation_id
+        self.turns = deque()
+        self.history_tokens = 0
+        self.summary = deque()  # one compact line per folded turn
+        self.summary_tokens = 0
+        self.last_used = time.monotonic()
+
+    def history_messages(self):
+        messages = []
+        if self.summary:
+            messages.append({
+                "role": "system",
+                "content": "Earlier in this conversation:\n" + "\n".join(self.summary)
+            })
+        for turn in self.turns:
+            messages.append({"role": "user", "content": turn.user})
+            messages.append({"role": "assistant", "content": turn.assistant})
+        return messages
+
+class ConversationStore:
+    """Server-side chat sessions with bounded memory.
+
+    Each session keeps its most recent turns verbatim within a token
+    budget; older turns are folded into a one-line-per-turn summary that is
+    itself capped, so the prompt stays a fixed size however long the chat
+    runs. Sessions expire after an idle TTL and the least recently used
+    ones are evicted beyond max_sessions.
+    """
+
+    def __init__(self, max_sessions=10000, idle_ttl_seconds=1800, max_turns=8,
+                 history_token_budget=1200, summary_token_budget=240, turn_token_limit=400):
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_turns = max_turns
+        self.history_token_budget = history_token_budget
+        self.summary_token_budget = summary_token_budget
+        self.turn_token_limit = turn_token_limit
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self.folded_turns = 0
+
+    def _purge_expired(self, now):
+        # Sessions are kept in last-used order, so expired ones sit at the front
+        while self._sessions:
+            conversation = next(iter(self._sessions.values()))
+            if now - conversation.last_used < self.idle_ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
+            self.expired += 1
+
+    def get_or_create(self, conversation_id: str = None):
+        now = time.monotonic()
+        with self._lock:
+            self._purge_expired(now)
+            conversation = self._sessions.get(conversation_id) if conversation_id else None
+            if conversation is None:
+                conversation = Conversation(uuid.uuid4().hex)
+                self._sessions[conversation.id] = conversation
+                self.created += 1
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._sessions.move_to_end(conversation_id)
+            conversation.last_used = now
+            return conversation
+
+    def record(self, conversation: Conversation, message: str, response: str):
+        turn = Turn(clip(message, self.turn_token_limit), clip(response, self.turn_token_limit))
+        with self._lock:
+            conversation.turns.append(turn)
+            conversation.history_tokens += turn.tokens
+            while conversation.turns and (
+                len(conversation.turns) > self.max_turns
+                or conversation.history_tokens > self.history_token_budget
+            ):
+                self._fold(conversation, conversation.turns.popleft())
+            conversation.last_used = time.monotonic()
+
+    def _fold(self, conversation, turn):
+        conversation.history_tokens -= turn.tokens
+        line = f"- User asked: {clip(turn.user, 40)} Assistant: {clip(first_sentence(turn.assistant), 40)}"
+        conversation.summary.append(line)
+        conversation.summary_tokens += estimate_tokens(line)
+        while conversation.summary_tokens > self.summary_token_budget and conversation.summary:
+            conversation.summary_tokens -= estimate_tokens(conversation.summary.popleft())
+        self.folded_turns += 1
+
+    def end(self, conversation_id: str):
+        with self._lock:
+            return self._sessions.pop(conversation_id, None) is not None
+
+    def stats(self):
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "idle_ttl_seconds": self.idle_ttl_seconds,
+                "created": self.created,
+                "expired": self.expired,
+                "evicted": self.evicted,
+                "folded_turns": self.folded_turns
+            }
\ No newline at end of file
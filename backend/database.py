@@ -1,4 +1,6 @@
-from sqlalchemy import create_engine
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -6,20 +8,131 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def env_flag(name: str, default: str):
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./medicart.db")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-)
+# Pool settings. Sync routes run on one worker's threadpool (40 threads),
+# so pool_size + max_overflow defaults to 40 and every thread can hold a
+# connection. With more threads than connections, a thread waits up to
+# DB_POOL_TIMEOUT seconds for one and then fails with a TimeoutError.
+# Multiply by the worker count when sizing the database's connection limit.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 30))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = env_flag("DB_POOL_PRE_PING", "true")
+SQLITE_WAL = env_flag("SQLITE_WAL", "true")
+# Serve the hot catalog reads from an asyncpg/aiosqlite engine on the event loop
+DATABASE_ASYNC = env_flag("DATABASE_ASYNC", "false")
+
+def is_sqlite_memory(url):
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+def engine_options(url):
+    if is_sqlite_memory(url):
+        # One shared connection per thread; pool sizing doesn't apply
+        return {"connect_args": {"check_same_thread": False}}
+
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if url.get_backend_name() == "sqlite":
+        # Wait on a locked database instead of failing immediately
+        options["connect_args"] = {"check_same_thread": False, "timeout": 30}
+    return options
+
+def configure_sqlite(sync_engine):
+    if not SQLITE_WAL or sync_engine.dialect.name != "sqlite" or is_sqlite_memory(sync_engine.url):
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # Readers no longer block on the writer (and vice versa)
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+def async_database_url(url):
+    driver = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}.get(url.get_backend_name())
+    if driver is None:
+        raise RuntimeError(f"No async driver configured for {url.get_backend_name()}")
+    return url.set(drivername=driver)
+
+engine = create_engine(DATABASE_URL, **engine_options(make_url(DATABASE_URL)))
+configure_sqlite(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = None
+AsyncSessionLocal = None
+if DATABASE_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    async_url = make_url(os.getenv("ASYNC_DATABASE_URL") or async_database_url(engine.url))
+    async_options = engine_options(async_url)
+    if async_url.get_backend_name() == "sqlite" and "pool_size" in async_options:
+        # aiosqlite defaults to NullPool, which reconnects on every request
+        async_options["poolclass"] = AsyncAdaptedQueuePool
+    async_engine = create_async_engine(async_url, **async_options)
+    configure_sqlite(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+class ThreadpoolSession:
+    """The subset of AsyncSession the async routes use, backed by a sync
+    Session whose calls run on the threadpool. Used when DATABASE_ASYNC is
+    off so those routes are written once against one API.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.used = False
+
+    async def execute(self, statement, params=None):
+        # Buffer the rows on the worker thread, as AsyncSession does
+        self.used = True
+        frozen = await run_in_threadpool(lambda: self.session.execute(statement, params).freeze())
+        return frozen()
+
+    async def scalars(self, statement, params=None):
+        return (await self.execute(statement, params)).scalars()
+
+    async def scalar(self, statement, params=None):
+        return (await self.execute(statement, params)).scalar()
+
+    async def run_sync(self, fn, *args, **kwargs):
+        self.used = True
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+    async def close(self):
+        # Cache hits never touch the session, so there is no connection to return
+        if self.used:
+            await run_in_threadpool(self.session.close)
+
+async def get_async_db():
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            yield session
+        return
+
+    session = ThreadpoolSession(SessionLocal())
+    try:
+        yield session
+    finally:
+        await session.close()
\ No newline at end of file
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+import asyncio
+import os
+from database import get_db
+from auth import get_current_user, UserPrincipal
+from events import event_broker, format_sse
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+# Keeps idle connections alive through proxies and notices dropped clients
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", 15))
+
+@router.get("/stream")
+async def event_stream(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    # The stream can stay open for hours; don't pin a pooled connection to it
+    db.close()
+    user_id = current_user.id
+
+    async def stream():
+        subscription = event_broker.subscribe(user_id)
+        try:
+            yield format_sse({"user_id": user_id}, event="ready")
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), EVENT_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield format_sse(message["data"], event=message["event"])
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/stats")
+def get_event_stats(current_user: UserPrincipal = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+    return event_broker.stats()
\ No newline at end of file
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+EVENT_BROKER = os.getenv("EVENT_BROKER", "memory")  # memory, postgres
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", 100))
+EVENT_CHANNEL = "medicart_events"
+# NOTIFY payloads are capped at 8000 bytes
+MAX_NOTIFY_BYTES = 7900
+
+def format_sse(data: dict, event: str = None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+class Subscription:
+    __slots__ = ("broker", "user_id", "loop", "queue")
+
+    def __init__(self, broker, user_id, loop, queue):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = queue
+
+    def push(self, message):
+        # Runs on the subscriber's event loop; a client that stops reading
+        # loses its oldest events rather than growing the queue
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.broker.dropped += 1
+        self.queue.put_nowait(message)
+
+class InMemoryBroker:
+    """Per-user fan-out of events to the streams open in this process.
+
+    publish() may be called from the threadpool that runs sync route
+    handlers; delivery is handed to each subscriber's event loop.
+    """
+
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, user_id: int):
+        subscription = Subscription(self, user_id, asyncio.get_running_loop(), asyncio.Queue(EVENT_QUEUE_SIZE))
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_id: int, event: str, data: dict):
+        self.published += 1
+        self._deliver({"user_id": user_id, "event": event, "data": data})
+
+    def _deliver(self, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(message["user_id"], ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, message)
+                self.delivered += 1
+            except RuntimeError:
+                # Loop already closed; the stream's own cleanup will follow
+                pass
+
+    def stats(self):
+        with self._lock:
+            connections = sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+            users = len(self._subscriptions)
+        return {
+            "backend": EVENT_BROKER,
+            "connections": connections,
+            "users": users,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped
+        }
+
+class PostgresBroker(InMemoryBroker):
+    """Shares events between workers through PostgreSQL LISTEN/NOTIFY.
+
+    publish() sends a NOTIFY instead of delivering locally; every worker,
+    including the publisher, runs a listener thread that feeds the
+    notifications it receives into its local subscriptions.
+    """
+
+    def __init__(self, dsn: str):
+        super().__init__()
+        self.dsn = dsn
+        self._publish_conn = None
+        self._publish_lock = threading.Lock()
+        self._listener = None
+
+    def _connect(self):
+        import psycopg2
+        conn = psycopg2.connect(self.dsn)
+        conn.autocommit = True
+        return conn
+
+    def subscribe(self, user_id: int):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name="event-listener", daemon=True)
+                self._listener.start()
+        return super().subscribe(user_id)
+
+    def publish(self, user_id: int, event: str, data: dict):
+        payload = json.dumps({"user_id": user_id, "event": event, "data": data})
+        if len(payload.encode()) > MAX_NOTIFY_BYTES:
+            payload = json.dumps({"user_id": user_id, "event": event, "data": {"id": data.get("id"), "truncated": True}})
+
+        with self._publish_lock:
+            try:
+                if self._publish_conn is None or self._publish_conn.closed:
+                    self._publish_conn = self._connect()
+                with self._publish_conn.cursor() as cursor:
+                    cursor.execute("SELECT pg_notify(%s, %s)", (EVENT_CHANNEL, payload))
+                self.published += 1
+            except Exception as e:
+                # Push is best effort; the change itself is already committed
+                logger.warning("Event publish failed: %s", e)
+                self._publish_conn = None
+
+    def _listen(self):
+        while True:
+            conn = None
+            try:
+                conn = self._connect()
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {EVENT_CHANNEL}")
+                while True:
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._deliver(json.loads(conn.notifies.pop(0).payload))
+            except Exception:
+                logger.exception("Event listener disconnected, reconnecting")
+                if conn is not None:
+                    conn.close()
+                time.sleep(1)
+
+def create_broker():
+    if EVENT_BROKER == "postgres":
+        from database import engine
+        return PostgresBroker(engine.url.set(drivername="postgresql").render_as_string(hide_password=False))
+    return InMemoryBroker()
+
+event_broker = create_broker()
\ No newline at end of file
@@ -0,0 +1,90 @@
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageOps
+from sqlalchemy import update
+import models
+from database import SessionLocal
+import asyncio
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+DERIVED_DIR = "uploads/prescriptions/derived"
+REVIEW_MAX_SIZE = (1600, 1600)
+THUMBNAIL_SIZE = (320, 320)
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_image_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+        return _executor
+
+def derivative_paths(content_hash: str):
+    return (
+        os.path.join(DERIVED_DIR, f"{content_hash}_review.webp"),
+        os.path.join(DERIVED_DIR, f"{content_hash}_thumb.webp"),
+    )
+
+def _save_webp(image, path, quality):
+    temp_path = f"{path}.tmp"
+    image.save(temp_path, "WEBP", quality=quality, method=4)
+    os.replace(temp_path, path)
+
+def render_derivatives(source_path: str, content_hash: str):
+    # Runs in a worker process. Re-encoding from pixel data drops EXIF
+    # (GPS, device info) after the orientation tag has been applied.
+    review_path, thumbnail_path = derivative_paths(content_hash)
+    if os.path.exists(review_path) and os.path.exists(thumbnail_path):
+        return review_path, thumbnail_path
+
+    os.makedirs(DERIVED_DIR, exist_ok=True)
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGB")
+
+        review = image.copy()
+        review.thumbnail(REVIEW_MAX_SIZE, Image.LANCZOS)
+        _save_webp(review, review_path, quality=80)
+
+        thumbnail = image.copy()
+        thumbnail.thumbnail(THUMBNAIL_SIZE, Image.LANCZOS)
+        _save_webp(thumbnail, thumbnail_path, quality=70)
+
+    return review_path, thumbnail_path
+
+def find_existing_derivatives(db, content_hash: str):
+    return db.query(
+        models.Prescription.review_image_url, models.Prescription.thumbnail_url
+    ).filter(
+        models.Prescription.content_hash == content_hash,
+        models.Prescription.thumbnail_url.isnot(None)
+    ).first()
+
+async def process_prescription_image(source_path: str, content_hash: str):
+    loop = asyncio.get_running_loop()
+    try:
+        review_path, thumbnail_path = await loop.run_in_executor(
+            get_image_executor(), render_derivatives, source_path, content_hash
+        )
+    except Exception:
+        logger.exception("Prescription image processing failed for %s", source_path)
+        return
+
+    # Every prescription sharing this content gets the same derivatives
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(models.Prescription)
+            .where(models.Prescription.content_hash == content_hash)
+            .values(review_image_url=f"/{review_path}", thumbnail_url=f"/{thumbnail_path}")
+        )
+        db.commit()
+    finally:
+        db.close()
\ No newline at end of file
@@ -0,0 +1,258 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, select, update
+from sqlalchemy.orm import Session
+import csv
+import json
+import math
+import os
+import models
+from database import get_db
+from auth import require_admin, UserPrincipal
+from catalog_cache import catalog_cache
+
+router = APIRouter(prefix="/inventory", tags=["inventory"])
+
+# Rows per UPDATE; each row binds a handful of parameters, which keeps a
+# chunk well inside SQLite's and PostgreSQL's bind limits
+SYNC_CHUNK_SIZE = int(os.getenv("INVENTORY_SYNC_CHUNK_SIZE", 500))
+MAX_SYNC_ROWS = int(os.getenv("INVENTORY_SYNC_MAX_ROWS", 200000))
+MAX_SYNC_BYTES = int(os.getenv("INVENTORY_SYNC_MAX_MB", 64)) * 1024 * 1024
+MAX_LINE_BYTES = int(os.getenv("INVENTORY_SYNC_MAX_LINE_BYTES", 64 * 1024))
+SYNC_FIELDS = {"id", "sku", "stock", "stock_delta", "price"}
+
+def feed_too_large(detail):
+    return HTTPException(status_code=413, detail=detail)
+
+async def read_lines(request: Request):
+    # Parse the feed as it arrives instead of buffering the whole body;
+    # the size caps bound what a single line or the whole body can hold
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > MAX_SYNC_BYTES:
+        raise feed_too_large(f"Feeds are limited to {MAX_SYNC_BYTES // (1024 * 1024)} MB")
+    received = 0
+    pending = b""
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > MAX_SYNC_BYTES:
+            raise feed_too_large(f"Feeds are limited to {MAX_SYNC_BYTES // (1024 * 1024)} MB")
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if len(line) > MAX_LINE_BYTES:
+                raise feed_too_large(f"Feed lines are limited to {MAX_LINE_BYTES} bytes")
+            yield line.decode("utf-8-sig").rstrip("\r")
+        if len(pending) > MAX_LINE_BYTES:
+            raise feed_too_large(f"Feed lines are limited to {MAX_LINE_BYTES} bytes")
+    if pending:
+        yield pending.decode("utf-8-sig").rstrip("\r")
+
+async def read_records(request: Request):
+    """Yield (line number, dict) for an NDJSON or CSV (with header) feed."""
+    lines = read_lines(request)
+    if "csv" in request.headers.get("content-type", ""):
+        header = None
+        line_number = 0
+        async for line in lines:
+            line_number += 1
+            if not line.strip():
+                continue
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [value.strip() for value in values]
+                continue
+            if len(values) != len(header):
+                yield line_number, ValueError(f"expected {len(header)} columns, got {len(values)}")
+                continue
+            yield line_number, {key: value.strip() for key, value in zip(header, values) if value.strip() != ""}
+    else:
+        line_number = 0
+        async for line in lines:
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_number, ValueError("invalid JSON")
+                continue
+            if not isinstance(record, dict):
+                yield line_number, ValueError("expected a JSON object")
+                continue
+            yield line_number, {key: value for key, value in record.items() if value is not None}
+
+def parse_int(value, field):
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lstrip("+-").isdigit():
+        return int(value)
+    raise ValueError(f"{field} must be an integer")
+
+def validate_record(record: dict):
+    unknown = set(record) - SYNC_FIELDS
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+    if "id" not in record and "sku" not in record:
+        raise ValueError("id or sku is required")
+    if "stock" in record and "stock_delta" in record:
+        raise ValueError("send either stock or stock_delta, not both")
+
+    change = {}
+    if "id" in record:
+        change["id"] = parse_int(record["id"], "id")
+    else:
+        change["sku"] = str(record["sku"])
+    if "stock" in record:
+        change["stock"] = parse_int(record["stock"], "stock")
+        if change["stock"] < 0:
+            raise ValueError("stock cannot be negative")
+    if "stock_delta" in record:
+        change["stock_delta"] = parse_int(record["stock_delta"], "stock_delta")
+    if "price" in record:
+        try:
+            change["price"] = float(record["price"])
+        except (TypeError, ValueError):
+            raise ValueError("price must be a number")
+        if not math.isfinite(change["price"]) or change["price"] < 0:
+            raise ValueError("price must be a non-negative number")
+    if len(change) == 1:
+        raise ValueError("nothing to update: send stock, stock_delta or price")
+    return change
+
+def chunks(values, size):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def resolve_ids(db: Session, changes):
+    ids_by_sku = {}
+    skus = {change["sku"] for _, change in changes if "sku" in change}
+    for chunk in chunks(skus, SYNC_CHUNK_SIZE):
+        ids_by_sku.update(db.execute(
+            select(models.Medicine.sku, models.Medicine.id).where(models.Medicine.sku.in_(chunk))
+        ).all())
+
+    known_ids = set(ids_by_sku.values())
+    ids = {change["id"] for _, change in changes if "id" in change} - known_ids
+    for chunk in chunks(ids, SYNC_CHUNK_SIZE):
+        known_ids.update(db.scalars(select(models.Medicine.id).where(models.Medicine.id.in_(chunk))))
+    return ids_by_sku, known_ids
+
+def merge_changes(changes, ids_by_sku, known_ids, results):
+    # Rows for the same medicine fold into one update, in feed order: an
+    # absolute stock resets earlier deltas, later deltas add to it
+    merged = {}
+    for line, change in changes:
+        medicine_id = change["id"] if "id" in change else ids_by_sku.get(change["sku"])
+        if medicine_id is None or medicine_id not in known_ids:
+            results.append({"line": line, **change, "status": "not_found"})
+            continue
+        target = merged.setdefault(medicine_id, {"stock": None, "delta": 0, "price": None})
+        if "stock" in change:
+            target["stock"] = change["stock"]
+            target["delta"] = 0
+        target["delta"] += change.get("stock_delta", 0)
+        if "price" in change:
+            target["price"] = change["price"]
+        results.append({"line": line, "id": medicine_id, "status": "updated"})
+    return merged
+
+def stock_expression(chunk):
+    absolute = {}
+    relative = {}
+    for medicine_id, target in chunk:
+        if target["stock"] is not None:
+            absolute[medicine_id] = target["stock"] + target["delta"]
+        elif target["delta"]:
+            relative[medicine_id] = target["delta"]
+    if not absolute and not relative:
+        return None
+
+    # Deltas are applied in SQL so concurrent checkouts aren't overwritten;
+    # a feed can't push stock below zero
+    current = models.Medicine.stock
+    adjusted = current + case(relative, value=models.Medicine.id, else_=0) if relative else current
+    clamped = case((adjusted < 0, 0), else_=adjusted) if relative else current
+    if not absolute:
+        return clamped
+    return case({medicine_id: max(value, 0) for medicine_id, value in absolute.items()},
+                value=models.Medicine.id, else_=clamped)
+
+def apply_changes(db: Session, merged):
+    updated = 0
+    for chunk in chunks(merged.items(), SYNC_CHUNK_SIZE):
+        values = {}
+        stock = stock_expression(chunk)
+        if stock is not None:
+            values["stock"] = stock
+        prices = {medicine_id: target["price"] for medicine_id, target in chunk if target["price"] is not None}
+        if prices:
+            values["price"] = case(prices, value=models.Medicine.id, else_=models.Medicine.price)
+        if not values:
+            continue
+        result = db.execute(
+            update(models.Medicine)
+            .where(models.Medicine.id.in_([medicine_id for medicine_id, _ in chunk]))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        updated += result.rowcount
+    return updated
+
+def sync_inventory(db: Session, changes, results):
+    # The whole feed lands in one transaction: lookups, then one UPDATE
+    # per chunk, then a single commit
+    try:
+        ids_by_sku, known_ids = resolve_ids(db, changes)
+        merged = merge_changes(changes, ids_by_sku, known_ids, results)
+        updated = apply_changes(db, merged)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return merged, updated
+
+@router.post("/sync")
+async def sync_inventory_feed(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_admin)
+):
+    """Apply a supplier stock/price feed.
+
+    The body is NDJSON (one object per line) or, with a text/csv content
+    type, CSV with a header row. Each row names a medicine by id or sku and
+    sets any of stock (absolute), stock_delta and price. Invalid or unknown
+    rows are reported and skipped; the rest are applied together.
+    """
+    changes = []
+    results = []
+    received = 0
+    async for line, record in read_records(request):
+        received += 1
+        if received > MAX_SYNC_ROWS:
+            raise HTTPException(status_code=413, detail=f"Feeds are limited to {MAX_SYNC_ROWS} rows")
+        if isinstance(record, Exception):
+            results.append({"line": line, "status": "invalid", "error": str(record)})
+            continue
+        try:
+            changes.append((line, validate_record(record)))
+        except ValueError as e:
+            results.append({"line": line, "status": "invalid", "error": str(e)})
+
+    merged, updated = await run_in_threadpool(sync_inventory, db, changes, results)
+    if merged:
+        catalog_cache.invalidate_medicines(merged.keys())
+
+    results.sort(key=lambda result: result["line"])
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return {
+        "received": received,
+        "medicines_updated": updated,
+        "rows": counts,
+        "results": results
+    }
\ No newline at end of file
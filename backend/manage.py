@@ -0,0 +1,262 @@
+"""MediCart management commands.
+
+    python manage.py init-db                      # create tables and search index
+    python manage.py seed                         # sample catalog + admin user
+    python manage.py import-medicines formulary.csv --batch-size 5000
+    python manage.py refresh-analytics --every 300  # incremental rollups
+
+Schema and seed work lives here rather than in app startup so API workers
+boot without touching the database. Imports stream CSV or JSONL in batches
+and upsert on the medicine's sku.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from itertools import islice
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import insert, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+import models
+from database import engine, SessionLocal
+from search import create_search_index
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_COLUMNS = [
+    "sku", "name", "description", "price", "category", "manufacturer",
+    "stock", "requires_prescription", "image_url", "is_featured",
+]
+UPDATE_COLUMNS = [column for column in IMPORT_COLUMNS if column != "sku"]
+
+SAMPLE_MEDICINES = [
+    {
+        "sku": "NAPA-BEXIMCO-500",
+        "name": "Napa",
+        "description": "Pain reliever and fever reducer",
+        "price": 200.00,
+        "category": "tablet",
+        "manufacturer": "Beximco",
+        "stock": 100,
+        "requires_prescription": False,
+        "is_featured": True
+    },
+    {
+        "sku": "DISPRIN-SQUARE-300",
+        "name": "Disprin",
+        "description": "Pain reliever tablet",
+        "price": 250.00,
+        "category": "tablet",
+        "manufacturer": "Square",
+        "stock": 50,
+        "requires_prescription": False,
+        "is_featured": True
+    },
+    {
+        "sku": "LEVOFOX-INCEPTA-500",
+        "name": "Levofox",
+        "description": "Antibiotic medication",
+        "price": 500.00,
+        "category": "tablet",
+        "manufacturer": "Incepta",
+        "stock": 30,
+        "requires_prescription": True,
+        "is_featured": True
+    }
+]
+
+def parse_bool(value):
+    if isinstance(value, bool) or value is None:
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y")
+
+def normalize_row(row: dict):
+    record = {column: None if row.get(column) == "" else row.get(column) for column in IMPORT_COLUMNS}
+    if not record["sku"] or not record["name"] or record["price"] is None:
+        raise ValueError(f"sku, name and price are required: {row}")
+    record["price"] = float(record["price"])
+    record["stock"] = int(record["stock"] or 0)
+    record["requires_prescription"] = bool(parse_bool(record["requires_prescription"]))
+    record["is_featured"] = bool(parse_bool(record["is_featured"]))
+    return record
+
+def read_rows(path: str, file_format: str = None):
+    file_format = file_format or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if file_format == "jsonl":
+            for line in stream:
+                if line.strip():
+                    yield normalize_row(json.loads(line))
+        else:
+            for row in csv.DictReader(stream):
+                yield normalize_row(row)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def batched(rows, size):
+    # Later rows win when a sku repeats inside one batch; ON CONFLICT cannot
+    # touch the same row twice in a single statement
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield list({row["sku"]: row for row in batch}.values())
+
+def upsert_statement(dialect_name):
+    if dialect_name == "postgresql":
+        statement = postgresql.insert(models.Medicine)
+    elif dialect_name == "sqlite":
+        statement = sqlite.insert(models.Medicine)
+    else:
+        return insert(models.Medicine)
+    return statement.on_conflict_do_update(
+        index_elements=["sku"],
+        set_={column: statement.excluded[column] for column in UPDATE_COLUMNS}
+    )
+
+def upsert_batches(batches, on_batch=None):
+    statement = upsert_statement(engine.dialect.name)
+    total = 0
+    with engine.begin() as conn:
+        for batch in batches:
+            conn.execute(statement, batch)
+            total += len(batch)
+            if on_batch:
+                on_batch(total)
+    return total
+
+def copy_batches(batches, on_batch=None):
+    # PostgreSQL: COPY each batch into a temp staging table, then merge it
+    # into medicines with one INSERT ... ON CONFLICT per batch
+    columns = ", ".join(IMPORT_COLUMNS)
+    updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in UPDATE_COLUMNS)
+    total = 0
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute(
+            "CREATE TEMP TABLE medicines_import ON COMMIT DROP AS "
+            f"SELECT {columns} FROM medicines WITH NO DATA"
+        )
+        for batch in batches:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for record in batch:
+                writer.writerow(["" if record[column] is None else record[column] for column in IMPORT_COLUMNS])
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY medicines_import ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+            cursor.execute(
+                f"INSERT INTO medicines ({columns}, created_at) "
+                f"SELECT {columns}, now() FROM medicines_import "
+                f"ON CONFLICT (sku) DO UPDATE SET {updates}"
+            )
+            cursor.execute("TRUNCATE medicines_import")
+            total += len(batch)
+            if on_batch:
+                on_batch(total)
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+    return total
+
+def alembic_config():
+    config = Config(os.path.join(BASE_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BASE_DIR, "migrations"))
+    return config
+
+def init_db(args=None):
+    config = alembic_config()
+    inspector = inspect(engine)
+    if inspector.has_table("users") and not inspector.has_table("alembic_version"):
+        # Database created by the old import-time create_all
+        columns = {column["name"] for column in inspector.get_columns("medicines")}
+        command.stamp(config, "0002" if "sku" in columns else "0001")
+    command.upgrade(config, "head")
+    create_search_index(engine)
+    print("Database schema is up to date")
+
+def seed(args=None):
+    upsert_batches([[normalize_row(medicine) for medicine in SAMPLE_MEDICINES]])
+
+    db = SessionLocal()
+    try:
+        if db.query(models.User).filter(models.User.email == "admin@medicart.com").first() is None:
+            from auth import get_password_hash
+            db.add(models.User(
+                name="Admin User",
+                email="admin@medicart.com",
+                password=get_password_hash(os.getenv("ADMIN_PASSWORD", "admin123")),
+                phone="+8801000000000",
+                role="admin"
+            ))
+            db.commit()
+    finally:
+        db.close()
+    print(f"Seeded {len(SAMPLE_MEDICINES)} medicines and the admin user")
+
+def import_medicines(args):
+    started = time.perf_counter()
+
+    def report(total):
+        elapsed = time.perf_counter() - started
+        print(f"  {total} rows ({total / elapsed:,.0f} rows/s)", file=sys.stderr)
+
+    batches = batched(read_rows(args.path, args.format), args.batch_size)
+    if engine.dialect.name == "postgresql" and not args.no_copy:
+        total = copy_batches(batches, report)
+    else:
+        total = upsert_batches(batches, report)
+
+    elapsed = time.perf_counter() - started
+    print(f"Imported {total} medicines in {elapsed:.2f}s ({total / elapsed if elapsed else 0:,.0f} rows/s)")
+
+def refresh_analytics(args):
+    from analytics import check_dialect, refresh_rollups
+
+    try:
+        check_dialect(engine)
+    except RuntimeError as e:
+        sys.exit(str(e))
+    while True:
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            processed = refresh_rollups(db)
+        finally:
+            db.close()
+        print(f"Rolled up {processed['orders']} orders and {processed['prescriptions']} prescription "
+              f"decisions in {time.perf_counter() - started:.2f}s")
+        if not args.every:
+            return
+        time.sleep(args.every)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MediCart management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("init-db", help="create tables and search indexes").set_defaults(handler=init_db)
+    commands.add_parser("seed", help="load the sample catalog and admin user").set_defaults(handler=seed)
+
+    importer = commands.add_parser("import-medicines", help="bulk upsert medicines from CSV or JSONL")
+    importer.add_argument("path", help="file to import, or - for stdin")
+    importer.add_argument("--format", choices=["csv", "jsonl"], help="defaults to the file extension")
+    importer.add_argument("--batch-size", type=int, default=5000)
+    importer.add_argument("--no-copy", action="store_true", help="use executemany upserts on PostgreSQL too")
+    importer.set_defaults(handler=import_medicines)
+
+    rollups = commands.add_parser("refresh-analytics", help="fold new orders and prescriptions into the analytics rollups")
+    rollups.add_argument("--every", type=float, help="keep running, refreshing every this many seconds")
+    rollups.set_defaults(handler=refresh_analytics)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,51 +1,121 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import and_, or_, select
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import models
-from database import get_db
+import schemas
+from database import get_db, get_async_db
+from pagination import encode_cursor, decode_cursor
+from search import apply_search
+from catalog_cache import catalog_cache, cached_response, medicine_tag, FEATURED_TAG
+from auth import require_admin, UserPrincipal
 
 router = APIRouter(prefix="/medicines", tags=["medicines"])
 
-@router.get("/")
-def get_medicines(
+MEDICINE_FIELDS = {column.name for column in models.Medicine.__table__.columns}
+MEDICINE_ADAPTER = TypeAdapter(schemas.Medicine)
+MEDICINE_LIST_ADAPTER = TypeAdapter(List[schemas.Medicine])
+
+def parse_fields(fields: Optional[str]):
+    if not fields:
+        return None
+    
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in MEDICINE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    
+    # id and name are always selected because the cursor is built from them
+    return ["id", "name"] + [field for field in requested if field not in ("id", "name")]
+
+# The catalog reads below are the hottest routes, so they are async and run
+# on the event loop when DATABASE_ASYNC is on (see database.get_async_db)
+
+@router.get("/", response_model=List[schemas.Medicine])
+async def get_medicines(
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=500),
     category: Optional[str] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db = Depends(get_async_db)
 ):
-    query = db.query(models.Medicine)
-    
-    if category:
-        query = query.filter(models.Medicine.category == category)
+    columns = parse_fields(fields)
+    entities = [getattr(models.Medicine, column) for column in columns] if columns else [models.Medicine]
     
     if search:
-        query = query.filter(models.Medicine.name.ilike(f"%{search}%"))
+        # Search results are ordered by relevance, so they page by offset.
+        # apply_search probes the index through the sync Session API
+        def run_search(session):
+            query = session.query(*entities)
+            if category:
+                query = query.filter(models.Medicine.category == category)
+            return apply_search(query, session, search).offset(skip).limit(limit).all()
+        
+        medicines = await db.run_sync(run_search)
+    else:
+        # Browsing pages by keyset on (name, id); the cursor replaces skip
+        statement = select(*entities).order_by(models.Medicine.name, models.Medicine.id)
+        if category:
+            statement = statement.where(models.Medicine.category == category)
+        if cursor:
+            name, medicine_id = decode_cursor(cursor, str, int)
+            statement = statement.where(or_(
+                models.Medicine.name > name,
+                and_(models.Medicine.name == name, models.Medicine.id > medicine_id)
+            ))
+        elif skip:
+            statement = statement.offset(skip)
+        
+        result = await db.execute(statement.limit(limit))
+        medicines = result.all() if columns else result.scalars().all()
+        if len(medicines) == limit:
+            response.headers["X-Next-Cursor"] = encode_cursor(medicines[-1].name, medicines[-1].id)
     
-    medicines = query.offset(skip).limit(limit).all()
+    if columns:
+        # Projections don't fit the Medicine schema, so they bypass response_model
+        return ORJSONResponse([dict(row._mapping) for row in medicines], headers=dict(response.headers))
     return medicines
 
-@router.get("/featured")
-def get_featured_medicines(db: Session = Depends(get_db)):
-    medicines = db.query(models.Medicine).filter(models.Medicine.is_featured == True).limit(10).all()
-    return medicines
+@router.get("/featured", response_model=List[schemas.Medicine])
+async def get_featured_medicines(request: Request, db = Depends(get_async_db)):
+    async def load():
+        return (await db.scalars(
+            select(models.Medicine).where(models.Medicine.is_featured == True).limit(10)
+        )).all()
+    
+    return await cached_response(
+        request, "featured", load,
+        lambda medicines: [FEATURED_TAG] + [medicine_tag(medicine.id) for medicine in medicines],
+        MEDICINE_LIST_ADAPTER
+    )
 
-@router.get("/{medicine_id}")
-def get_medicine(medicine_id: int, db: Session = Depends(get_db)):
-    medicine = db.query(models.Medicine).filter(models.Medicine.id == medicine_id).first()
-    if not medicine:
-        raise HTTPException(status_code=404, detail="Medicine not found")
-    return medicine
+@router.get("/{medicine_id}", response_model=schemas.Medicine)
+async def get_medicine(medicine_id: int, request: Request, db = Depends(get_async_db)):
+    async def load():
+        medicine = await db.scalar(select(models.Medicine).where(models.Medicine.id == medicine_id))
+        if not medicine:
+            raise HTTPException(status_code=404, detail="Medicine not found")
+        return medicine
+    
+    return await cached_response(
+        request, f"medicine:{medicine_id}", load, lambda medicine: [medicine_tag(medicine.id)], MEDICINE_ADAPTER
+    )
 
-@router.post("/")
+@router.post("/", response_model=schemas.Medicine)
 def create_medicine(medicine_data: dict, db: Session = Depends(get_db)):
     db_medicine = models.Medicine(**medicine_data)
     db.add(db_medicine)
     db.commit()
     db.refresh(db_medicine)
+    catalog_cache.invalidate_medicines([db_medicine.id], featured=bool(db_medicine.is_featured))
     return db_medicine
 
-@router.put("/{medicine_id}")
+@router.put("/{medicine_id}", response_model=schemas.Medicine)
 def update_medicine(medicine_id: int, medicine_data: dict, db: Session = Depends(get_db)):
     medicine = db.query(models.Medicine).filter(models.Medicine.id == medicine_id).first()
     if not medicine:
@@ -56,6 +126,8 @@ def update_medicine(medicine_id: int, medicine_data: dict, db: Session = Depends
     
     db.commit()
     db.refresh(medicine)
+    # is_featured may have flipped either way, so always drop the featured list
+    catalog_cache.invalidate_medicines([medicine_id], featured=True)
     return medicine
 
 @router.delete("/{medicine_id}")
@@ -64,6 +136,12 @@ def delete_medicine(medicine_id: int, db: Session = Depends(get_db)):
     if not medicine:
         raise HTTPException(status_code=404, detail="Medicine not found")
     
+    was_featured = bool(medicine.is_featured)
     db.delete(medicine)
     db.commit()
-    return {"message": "Medicine deleted successfully"}
\ No newline at end of file
+    catalog_cache.invalidate_medicines([medicine_id], featured=was_featured)
+    return {"message": "Medicine deleted successfully"}
+
+@router.get("/cache/stats")
+def get_catalog_cache_stats(current_user: UserPrincipal = Depends(require_admin)):
+    return catalog_cache.stats()
\ No newline at end of file
@@ -0,0 +1,210 @@
+"""Request-level performance metrics in the Prometheus text format.
+
+MetricsMiddleware times every request per route template and, through
+SQLAlchemy engine hooks, counts the queries it issues and the time spent
+in them. Code that calls out to slow dependencies (Groq) records spans
+with timed(). Everything is rendered on /metrics, and each response gets
+a Server-Timing header with the current request's breakdown.
+
+Metrics live in process memory, so with several workers each one reports
+its own series; scrape every worker or aggregate on the Prometheus side.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+import threading
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    labels = _format_labels(self.labels, label_values, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labels, label_values, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                labels = _format_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {series[-2]:.6f}")
+                lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+REQUEST_LATENCY = Histogram(
+    "medicart_http_request_duration_seconds", "Time to serve a request, by route template",
+    labels=("method", "route", "status")
+)
+REQUEST_QUERIES = Histogram(
+    "medicart_http_request_db_queries", "SQL statements issued while serving a request",
+    labels=("method", "route"), buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    "medicart_http_request_db_duration_seconds", "Time spent in SQL while serving a request",
+    labels=("method", "route")
+)
+DB_QUERIES = Counter("medicart_db_queries_total", "SQL statements executed, including background work")
+DB_TIME = Counter("medicart_db_query_seconds_total", "Time spent executing SQL, including background work")
+SPAN_LATENCY = Histogram(
+    "medicart_span_duration_seconds", "Timed calls to external services",
+    labels=("span", "outcome")
+)
+
+REGISTRY = [REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_DB_TIME, DB_QUERIES, DB_TIME, SPAN_LATENCY]
+
+class RequestStats:
+    __slots__ = ("started", "queries", "db_seconds", "spans")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.spans = {}
+
+    def add_span(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def server_timing(self):
+        entries = [f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries"']
+        entries += [f"{name.replace('.', '-')};dur={seconds * 1000:.1f}" for name, seconds in self.spans.items()]
+        entries.append(f"app;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+# The stats object is shared by reference, so updates made in threadpool
+# handlers (which run in a copy of the context) still reach the middleware
+current_request = ContextVar("current_request", default=None)
+
+def record_span(name, seconds, outcome="ok"):
+    SPAN_LATENCY.observe(seconds, name, outcome)
+    stats = current_request.get()
+    if stats is not None:
+        stats.add_span(name, seconds)
+
+@contextmanager
+def timed(name):
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        record_span(name, time.perf_counter() - started, outcome)
+
+def instrument_engine(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERIES.inc()
+        DB_TIME.inc(amount=elapsed)
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+        if started:
+            started.pop()
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses pass straight through."""
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths = None
+
+    def route_path(self, scope):
+        # Label by route template, never the raw path, to keep series bounded
+        if self._route_paths is None:
+            routes = scope["app"].router.routes
+            self._route_paths = {getattr(route, "endpoint", getattr(route, "app", None)): route.path for route in routes}
+        return self._route_paths.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"server-timing", stats.server_timing().encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+            method, route = scope["method"], self.route_path(scope)
+            REQUEST_LATENCY.observe(time.perf_counter() - stats.started, method, route, status)
+            REQUEST_QUERIES.observe(stats.queries, method, route)
+            REQUEST_DB_TIME.observe(stats.db_seconds, method, route)
+
+def render_metrics():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
\ No newline at end of file
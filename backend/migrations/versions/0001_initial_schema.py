@@ -0,0 +1,116 @@
+"""initial schema
+
+Matches the tables models.Base.metadata.create_all produced before
+migrations were introduced. Existing databases are stamped at this
+revision by manage.py init-db instead of running it.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("email", sa.String(100), nullable=False),
+        sa.Column("password", sa.String(255), nullable=False),
+        sa.Column("phone", sa.String(20), nullable=False),
+        sa.Column("address", sa.Text()),
+        sa.Column("role", sa.String(20)),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "medicines",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(200), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("category", sa.String(50)),
+        sa.Column("manufacturer", sa.String(100)),
+        sa.Column("stock", sa.Integer()),
+        sa.Column("requires_prescription", sa.Boolean()),
+        sa.Column("image_url", sa.String(500)),
+        sa.Column("is_featured", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_medicines_id", "medicines", ["id"])
+
+    op.create_table(
+        "prescriptions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("image_url", sa.String(500), nullable=False),
+        sa.Column("status", sa.String(20)),
+        sa.Column("verified_by", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("verification_notes", sa.Text()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_prescriptions_id", "prescriptions", ["id"])
+
+    op.create_table(
+        "prescription_medicines",
+        sa.Column("prescription_id", sa.Integer(), sa.ForeignKey("prescriptions.id")),
+        sa.Column("medicine_id", sa.Integer(), sa.ForeignKey("medicines.id")),
+        sa.Column("quantity", sa.Integer()),
+    )
+
+    op.create_table(
+        "orders",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("prescription_id", sa.Integer(), sa.ForeignKey("prescriptions.id"), nullable=True),
+        sa.Column("total_amount", sa.Float(), nullable=False),
+        sa.Column("status", sa.String(20)),
+        sa.Column("shipping_address", sa.Text()),
+        sa.Column("payment_status", sa.String(20)),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_orders_id", "orders", ["id"])
+
+    op.create_table(
+        "order_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("order_id", sa.Integer(), sa.ForeignKey("orders.id")),
+        sa.Column("medicine_id", sa.Integer(), sa.ForeignKey("medicines.id")),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_order_items_id", "order_items", ["id"])
+
+    op.create_table(
+        "consultations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("pharmacist_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("question", sa.Text(), nullable=False),
+        sa.Column("response", sa.Text()),
+        sa.Column("status", sa.String(20)),
+        sa.Column("category", sa.String(50)),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_consultations_id", "consultations", ["id"])
+
+def downgrade():
+    op.drop_table("consultations")
+    op.drop_table("order_items")
+    op.drop_table("orders")
+    op.drop_table("prescription_medicines")
+    op.drop_table("prescriptions")
+    op.drop_table("medicines")
+    op.drop_table("users")
\ No newline at end of file
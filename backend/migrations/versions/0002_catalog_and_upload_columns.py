@@ -0,0 +1,35 @@
+"""medicine sku, catalog browse index and prescription upload columns
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("medicines", sa.Column("sku", sa.String(64)))
+    op.create_index("ix_medicines_sku", "medicines", ["sku"], unique=True)
+    op.create_index("ix_medicines_name_id", "medicines", ["name", "id"])
+
+    op.add_column("prescriptions", sa.Column("content_hash", sa.String(64)))
+    op.add_column("prescriptions", sa.Column("review_image_url", sa.String(500)))
+    op.add_column("prescriptions", sa.Column("thumbnail_url", sa.String(500)))
+    op.create_index("ix_prescriptions_content_hash", "prescriptions", ["content_hash"])
+
+def downgrade():
+    op.drop_index("ix_prescriptions_content_hash", table_name="prescriptions")
+    with op.batch_alter_table("prescriptions") as batch:
+        batch.drop_column("thumbnail_url")
+        batch.drop_column("review_image_url")
+        batch.drop_column("content_hash")
+
+    op.drop_index("ix_medicines_name_id", table_name="medicines")
+    op.drop_index("ix_medicines_sku", table_name="medicines")
+    with op.batch_alter_table("medicines") as batch:
+        batch.drop_column("sku")
\ No newline at end of file
@@ -0,0 +1,39 @@
+"""composite indexes for per-user listings, staff status queues and featured medicines
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_medicines_is_featured", "medicines", ["is_featured"]),
+    ("ix_orders_user_id_created_at", "orders", ["user_id", "created_at"]),
+    ("ix_orders_status_created_at", "orders", ["status", "created_at"]),
+    ("ix_order_items_order_id", "order_items", ["order_id"]),
+    ("ix_order_items_medicine_id", "order_items", ["medicine_id"]),
+    ("ix_prescriptions_user_id_created_at", "prescriptions", ["user_id", "created_at"]),
+    ("ix_prescriptions_status_created_at", "prescriptions", ["status", "created_at"]),
+    ("ix_consultations_user_id_created_at", "consultations", ["user_id", "created_at"]),
+    ("ix_consultations_status_created_at", "consultations", ["status", "created_at"]),
+]
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        # Build without blocking checkout and upload writes on large tables
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        return
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""consultation priority and review leases for the pharmacist work queue
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table("consultations") as batch:
+        batch.add_column(sa.Column("priority", sa.Integer))
+        batch.add_column(sa.Column("claimed_by", sa.Integer))
+        batch.add_column(sa.Column("claimed_until", sa.DateTime))
+        batch.create_foreign_key("fk_consultations_claimed_by", "users", ["claimed_by"], ["id"])
+
+    with op.batch_alter_table("prescriptions") as batch:
+        batch.add_column(sa.Column("claimed_by", sa.Integer))
+        batch.add_column(sa.Column("claimed_until", sa.DateTime))
+        batch.create_foreign_key("fk_prescriptions_claimed_by", "users", ["claimed_by"], ["id"])
+
+    op.execute(
+        "UPDATE consultations SET priority = CASE WHEN category = 'emergency' THEN 0 ELSE 1 END"
+    )
+    op.create_index("ix_consultations_queue", "consultations", ["status", "priority", "id"])
+    op.create_index("ix_prescriptions_queue", "prescriptions", ["status", "id"])
+
+def downgrade():
+    op.drop_index("ix_prescriptions_queue", table_name="prescriptions")
+    op.drop_index("ix_consultations_queue", table_name="consultations")
+
+    with op.batch_alter_table("prescriptions") as batch:
+        batch.drop_constraint("fk_prescriptions_claimed_by", type_="foreignkey")
+        batch.drop_column("claimed_until")
+        batch.drop_column("claimed_by")
+
+    with op.batch_alter_table("consultations") as batch:
+        batch.drop_constraint("fk_consultations_claimed_by", type_="foreignkey")
+        batch.drop_column("claimed_until")
+        batch.drop_column("claimed_by")
+        batch.drop_column("priority")
\ No newline at end of file
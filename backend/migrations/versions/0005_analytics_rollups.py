@@ -0,0 +1,69 @@
+"""daily sales and prescription rollups with refresh watermarks
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table("prescriptions") as batch:
+        batch.add_column(sa.Column("verified_at", sa.DateTime))
+
+    # Decisions made before this column existed are dated by their last update
+    op.execute(
+        "UPDATE prescriptions SET verified_at = updated_at WHERE status IN ('verified', 'rejected')"
+    )
+    op.create_index("ix_prescriptions_verified_at", "prescriptions", ["verified_at", "id"])
+
+    op.create_table(
+        "sales_daily",
+        sa.Column("day", sa.Date, primary_key=True),
+        sa.Column("medicine_id", sa.Integer, primary_key=True),
+        sa.Column("orders", sa.Integer, nullable=False),
+        sa.Column("units", sa.Integer, nullable=False),
+        sa.Column("revenue", sa.Float, nullable=False),
+    )
+    op.create_table(
+        "sales_daily_totals",
+        sa.Column("day", sa.Date, primary_key=True),
+        sa.Column("orders", sa.Integer, nullable=False),
+        sa.Column("units", sa.Integer, nullable=False),
+        sa.Column("revenue", sa.Float, nullable=False),
+    )
+    op.create_table(
+        "prescription_daily",
+        sa.Column("day", sa.Date, primary_key=True),
+        sa.Column("verified", sa.Integer, nullable=False),
+        sa.Column("rejected", sa.Integer, nullable=False),
+        sa.Column("turnaround_seconds", sa.Float, nullable=False),
+        sa.Column("max_turnaround_seconds", sa.Float, nullable=False),
+    )
+    watermarks = op.create_table(
+        "analytics_watermarks",
+        sa.Column("name", sa.String(50), primary_key=True),
+        sa.Column("last_id", sa.Integer, nullable=False),
+        sa.Column("last_at", sa.DateTime),
+        sa.Column("version", sa.Integer, nullable=False),
+        sa.Column("updated_at", sa.DateTime),
+    )
+    op.bulk_insert(watermarks, [
+        {"name": "orders", "last_id": 0, "version": 0},
+        {"name": "prescriptions", "last_id": 0, "version": 0},
+    ])
+
+def downgrade():
+    op.drop_table("analytics_watermarks")
+    op.drop_table("prescription_daily")
+    op.drop_table("sales_daily_totals")
+    op.drop_table("sales_daily")
+    op.drop_index("ix_prescriptions_verified_at", table_name="prescriptions")
+
+    with op.batch_alter_table("prescriptions") as batch:
+        batch.drop_column("verified_at")
\ No newline at end of file
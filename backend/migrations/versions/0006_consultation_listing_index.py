@@ -0,0 +1,26 @@
+"""index for the staff consultation listing ordered by newest first
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_consultations_created_at_id", "consultations", ["created_at", "id"],
+                postgresql_concurrently=True, if_not_exists=True
+            )
+        return
+
+    op.create_index("ix_consultations_created_at_id", "consultations", ["created_at", "id"], if_not_exists=True)
+
+def downgrade():
+    op.drop_index("ix_consultations_created_at_id", table_name="consultations")
\ No newline at end of file
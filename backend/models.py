@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, Text, ForeignKey, Table, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -27,14 +27,15 @@ class User(Base):
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
-    prescriptions = relationship("Prescription", back_populates="user")
+    prescriptions = relationship("Prescription", back_populates="user", foreign_keys="Prescription.user_id")
     orders = relationship("Order", back_populates="user")
-    consultations = relationship("Consultation", back_populates="user")
+    consultations = relationship("Consultation", back_populates="user", foreign_keys="Consultation.user_id")
 
 class Medicine(Base):
     __tablename__ = "medicines"
     
     id = Column(Integer, primary_key=True, index=True)
+    sku = Column(String(64), unique=True, index=True)  # natural key for catalog imports
     name = Column(String(200), nullable=False)
     description = Column(Text)
     price = Column(Float, nullable=False)
@@ -43,12 +44,15 @@ class Medicine(Base):
     stock = Column(Integer, default=0)
     requires_prescription = Column(Boolean, default=False)
     image_url = Column(String(500))
-    is_featured = Column(Boolean, default=False)
+    is_featured = Column(Boolean, default=False, index=True)
     created_at = Column(DateTime, default=func.now())
     
     # Relationships
     order_items = relationship("OrderItem", back_populates="medicine")
     prescriptions = relationship("Prescription", secondary=prescription_medicines, back_populates="medicines")
+    
+    # Keyset pagination order for catalog browsing
+    __table_args__ = (Index("ix_medicines_name_id", "name", "id"),)
 
 class Prescription(Base):
     __tablename__ = "prescriptions"
@@ -56,16 +60,29 @@ class Prescription(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     image_url = Column(String(500), nullable=False)
+    content_hash = Column(String(64), index=True)  # sha256 of the uploaded file
+    review_image_url = Column(String(500))  # downscaled WebP, filled in by image_processing
+    thumbnail_url = Column(String(500))
     status = Column(String(20), default="pending")  # pending, verified, rejected, processing
     verified_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     verification_notes = Column(Text)
+    verified_at = Column(DateTime)  # first verify/reject decision, UTC
+    claimed_by = Column(Integer, ForeignKey("users.id"), nullable=True)  # pharmacist holding the review lease
+    claimed_until = Column(DateTime)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
-    user = relationship("User", back_populates="prescriptions")
+    user = relationship("User", back_populates="prescriptions", foreign_keys=[user_id])
     medicines = relationship("Medicine", secondary=prescription_medicines, back_populates="prescriptions")
     orders = relationship("Order", back_populates="prescription")
+    
+    __table_args__ = (
+        Index("ix_prescriptions_user_id_created_at", "user_id", "created_at"),
+        Index("ix_prescriptions_status_created_at", "status", "created_at"),
+        Index("ix_prescriptions_queue", "status", "id"),
+        Index("ix_prescriptions_verified_at", "verified_at", "id"),
+    )
 
 class Order(Base):
     __tablename__ = "orders"
@@ -84,13 +101,18 @@ class Order(Base):
     user = relationship("User", back_populates="orders")
     prescription = relationship("Prescription", back_populates="orders")
     items = relationship("OrderItem", back_populates="order")
+    
+    __table_args__ = (
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+        Index("ix_orders_status_created_at", "status", "created_at"),
+    )
 
 class OrderItem(Base):
     __tablename__ = "order_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
-    medicine_id = Column(Integer, ForeignKey("medicines.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
+    medicine_id = Column(Integer, ForeignKey("medicines.id"), index=True)
     quantity = Column(Integer, nullable=False)
     price = Column(Float, nullable=False)
     
@@ -108,9 +130,56 @@ class Consultation(Base):
     response = Column(Text)
     status = Column(String(20), default="pending")  # pending, answered, closed
     category = Column(String(50), default="general")  # medication, side-effects, interactions, general, emergency
+    priority = Column(Integer, default=1)  # 0 = emergency; the work queue serves lower first
+    claimed_by = Column(Integer, ForeignKey("users.id"), nullable=True)  # pharmacist holding the lease
+    claimed_until = Column(DateTime)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
     user = relationship("User", back_populates="consultations", foreign_keys=[user_id])
-    pharmacist = relationship("User", foreign_keys=[pharmacist_id])
\ No newline at end of file
+    pharmacist = relationship("User", foreign_keys=[pharmacist_id])
+    
+    __table_args__ = (
+        Index("ix_consultations_user_id_created_at", "user_id", "created_at"),
+        Index("ix_consultations_status_created_at", "status", "created_at"),
+        Index("ix_consultations_queue", "status", "priority", "id"),
+        Index("ix_consultations_created_at_id", "created_at", "id"),
+    )
+
+# Analytics rollups, maintained incrementally by analytics.refresh_rollups
+
+class SalesDaily(Base):
+    __tablename__ = "sales_daily"
+    
+    day = Column(Date, primary_key=True)
+    medicine_id = Column(Integer, primary_key=True)  # no FK: rollups outlive deleted medicines
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+class SalesDailyTotal(Base):
+    __tablename__ = "sales_daily_totals"
+    
+    day = Column(Date, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+class PrescriptionDaily(Base):
+    __tablename__ = "prescription_daily"
+    
+    day = Column(Date, primary_key=True)
+    verified = Column(Integer, nullable=False, default=0)
+    rejected = Column(Integer, nullable=False, default=0)
+    turnaround_seconds = Column(Float, nullable=False, default=0)  # sum over the day's decisions
+    max_turnaround_seconds = Column(Float, nullable=False, default=0)
+
+class AnalyticsWatermark(Base):
+    __tablename__ = "analytics_watermarks"
+    
+    name = Column(String(50), primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+    last_at = Column(DateTime)
+    version = Column(Integer, nullable=False, default=0)  # bumped on every advance; guards concurrent refreshes
+    updated_at = Column(DateTime)
\ No newline at end of file
@@ -1,45 +1,131 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import List
 import models
-from database import get_db
-from auth import get_current_user
+import schemas
+from database import get_db, get_async_db
+from auth import get_current_user, UserPrincipal
+from catalog_cache import catalog_cache
+from events import event_broker
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
-@router.post("/")
+MAX_QUOTE_LINES = 200
+
+def reserve_stock(db: Session, quantities: dict):
+    # Decrement every line in one conditional UPDATE; a row whose stock is
+    # too low is skipped, so a short rowcount means the reservation failed
+    result = db.execute(
+        update(models.Medicine)
+        .where(
+            models.Medicine.id.in_(quantities.keys()),
+            models.Medicine.stock >= case(quantities, value=models.Medicine.id)
+        )
+        .values(stock=models.Medicine.stock - case(quantities, value=models.Medicine.id))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == len(quantities)
+
+def cart_quantities(items):
+    # Merge repeated lines so each medicine is priced once
+    if not isinstance(items, list) or len(items) > MAX_QUOTE_LINES:
+        raise HTTPException(status_code=400, detail=f"items must be a list of at most {MAX_QUOTE_LINES} lines")
+    quantities = {}
+    for item in items:
+        medicine_id = item.get("medicine_id") if isinstance(item, dict) else None
+        quantity = item.get("quantity", 1) if isinstance(item, dict) else None
+        if type(medicine_id) is not int or type(quantity) is not int or quantity < 1:
+            raise HTTPException(status_code=400, detail="Each item needs an integer medicine_id and a positive quantity")
+        quantities[medicine_id] = quantities.get(medicine_id, 0) + quantity
+    return dict(sorted(quantities.items()))
+
+def build_quote(quantities: dict, medicines: dict):
+    lines = []
+    total = 0.0
+    for medicine_id, quantity in quantities.items():
+        medicine = medicines.get(medicine_id)
+        if medicine is None:
+            lines.append({"medicine_id": medicine_id, "quantity": quantity, "status": "not_found"})
+            continue
+        line_total = round(medicine.price * quantity, 2)
+        total += line_total
+        lines.append({
+            "medicine_id": medicine_id,
+            "name": medicine.name,
+            "quantity": quantity,
+            "price": medicine.price,
+            "line_total": line_total,
+            "stock": medicine.stock,
+            "requires_prescription": bool(medicine.requires_prescription),
+            "status": "ok" if medicine.stock >= quantity else "insufficient_stock"
+        })
+    return {
+        "items": lines,
+        "total": round(total, 2),
+        "requires_prescription": any(line.get("requires_prescription") for line in lines),
+        "can_checkout": bool(lines) and all(line["status"] == "ok" for line in lines)
+    }
+
+@router.post("/quote")
+async def quote_cart(cart: dict, db = Depends(get_async_db)):
+    """Price and check a whole cart in one query, before checkout."""
+    # Not cached: carts rarely repeat, so their quotes would only push hot
+    # catalog entries out of the shared cache
+    quantities = cart_quantities(cart.get("items", []))
+    rows = await db.execute(
+        select(
+            models.Medicine.id, models.Medicine.name, models.Medicine.price,
+            models.Medicine.stock, models.Medicine.requires_prescription
+        ).where(models.Medicine.id.in_(quantities.keys()))
+    )
+    return build_quote(quantities, {row.id: row for row in rows})
+
+@router.post("/", response_model=schemas.OrderResult)
 def create_order(
     order_data: dict,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
-    # Calculate total amount and validate items
-    total_amount = 0
-    order_items = []
-    
-    for item in order_data.get("items", []):
-        medicine = db.query(models.Medicine).filter(
-            models.Medicine.id == item["medicine_id"]
-        ).first()
-        
+    # Same validation as the quote: integer ids, positive quantities and
+    # repeated lines merged, so each medicine is reserved once
+    quantities = cart_quantities(order_data.get("items", []))
+    if not quantities:
+        raise HTTPException(status_code=400, detail="Order must contain at least one item")
+    
+    medicines = {
+        medicine.id: medicine
+        for medicine in db.query(
+            models.Medicine.id, models.Medicine.name, models.Medicine.price, models.Medicine.stock
+        ).filter(models.Medicine.id.in_(quantities.keys()))
+    }
+    
+    for medicine_id, quantity in quantities.items():
+        medicine = medicines.get(medicine_id)
         if not medicine:
-            raise HTTPException(status_code=404, detail=f"Medicine {item['medicine_id']} not found")
+            raise HTTPException(status_code=404, detail=f"Medicine {medicine_id} not found")
         
-        if medicine.stock < item["quantity"]:
+        if medicine.stock < quantity:
             raise HTTPException(
                 status_code=400,
                 detail=f"Insufficient stock for {medicine.name}. Available: {medicine.stock}"
             )
-        
-        total_amount += medicine.price * item["quantity"]
-        
-        # Update stock
-        medicine.stock -= item["quantity"]
-        
-        order_items.append({
-            "medicine_id": medicine.id,
-            "quantity": item["quantity"],
-            "price": medicine.price
-        })
+    
+    if not reserve_stock(db, quantities):
+        # Another checkout took the stock between our read and the update
+        db.rollback()
+        current_stock = dict(db.query(models.Medicine.id, models.Medicine.stock).filter(
+            models.Medicine.id.in_(quantities.keys())
+        ).all())
+        for medicine_id, quantity in quantities.items():
+            if current_stock.get(medicine_id, 0) < quantity:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Insufficient stock for {medicines[medicine_id].name}. Available: {current_stock.get(medicine_id, 0)}"
+                )
+        raise HTTPException(status_code=409, detail="Stock changed during checkout, please retry")
+    
+    total_amount = sum(medicines[medicine_id].price * quantity for medicine_id, quantity in quantities.items())
     
     # Create order
     order = models.Order(
@@ -50,20 +136,21 @@ def create_order(
     )
     
     db.add(order)
-    db.commit()
-    db.refresh(order)
+    db.flush()
     
-    # Create order items
-    for item in order_items:
-        order_item = models.OrderItem(
-            order_id=order.id,
-            medicine_id=item["medicine_id"],
-            quantity=item["quantity"],
-            price=item["price"]
-        )
-        db.add(order_item)
+    # Create order items in a single executemany
+    db.execute(insert(models.OrderItem), [
+        {
+            "order_id": order.id,
+            "medicine_id": medicine_id,
+            "quantity": quantity,
+            "price": medicines[medicine_id].price
+        }
+        for medicine_id, quantity in quantities.items()
+    ])
     
     db.commit()
+    catalog_cache.invalidate_medicines(quantities.keys())
     db.refresh(order)
     
     return {
@@ -71,23 +158,31 @@ def create_order(
         "order": order
     }
 
-@router.get("/my-orders")
+def order_detail_query(db: Session):
+    # Items (with their medicine) come in one extra SELECT ... IN query and
+    # the prescription is joined, so any number of orders costs two queries
+    return db.query(models.Order).options(
+        selectinload(models.Order.items).joinedload(models.OrderItem.medicine),
+        joinedload(models.Order.prescription)
+    )
+
+@router.get("/my-orders", response_model=List[schemas.Order])
 def get_my_orders(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
-    orders = db.query(models.Order).filter(
+    orders = order_detail_query(db).filter(
         models.Order.user_id == current_user.id
-    ).all()
+    ).order_by(models.Order.created_at.desc(), models.Order.id.desc()).all()
     return orders
 
-@router.get("/{order_id}")
+@router.get("/{order_id}", response_model=schemas.Order)
 def get_order(
     order_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
-    order = db.query(models.Order).filter(models.Order.id == order_id).first()
+    order = order_detail_query(db).filter(models.Order.id == order_id).first()
     
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -97,12 +192,12 @@ def get_order(
     
     return order
 
-@router.put("/{order_id}/status")
+@router.put("/{order_id}/status", response_model=schemas.OrderResult)
 def update_order_status(
     order_id: int,
     status_data: dict,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
@@ -116,6 +211,8 @@ def update_order_status(
     db.commit()
     db.refresh(order)
     
+    event_broker.publish(order.user_id, "order.status", {"id": order.id, "status": order.status})
+    
     return {
         "message": "Order status updated successfully",
         "order": order
@@ -0,0 +1,19 @@
+from fastapi import HTTPException
+import base64
+import json
+
+# Opaque keyset cursors: a base64url-encoded JSON list holding the sort key
+# of the last row on the page
+
+def encode_cursor(*values):
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, *types):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if len(values) != len(types):
+            raise ValueError("cursor length mismatch")
+        return [value_type(value) for value, value_type in zip(values, types)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
\ No newline at end of file
@@ -1,8 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
+from typing import List
 import models
+import schemas
 from database import get_db
-from auth import get_current_user
+from auth import get_current_user, UserPrincipal
+from events import event_broker
+from queue_routes import ensure_not_claimed_by_other, release_claim
+from image_processing import find_existing_derivatives, process_prescription_image
+import aiofiles
+import aiofiles.os
+import hashlib
+import magic
+import mimetypes
 import os
 import uuid
 from datetime import datetime
@@ -10,59 +21,172 @@ from datetime import datetime
 router = APIRouter(prefix="/prescriptions", tags=["prescriptions"])
 
 UPLOAD_DIR = "uploads/prescriptions"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+UPLOAD_CHUNK_SIZE = 256 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_PRESCRIPTION_UPLOAD_MB", 20)) * 1024 * 1024
+# Room for the multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+IMAGE_EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/gif": "gif",
+}
+# Pillow can't decode these without extra plugins, so no review image or
+# thumbnail could ever be made for them
+UNSUPPORTED_IMAGE_TYPES = {"image/heic", "image/heif", "image/avif"}
+_upload_dir_ready = False
 
-@router.post("/upload")
+def ensure_upload_dirs():
+    # Run by the app's lifespan; save_upload also covers apps started
+    # without it (e.g. a TestClient outside a with block)
+    global _upload_dir_ready
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    _upload_dir_ready = True
+
+def upload_too_large():
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size is {MAX_UPLOAD_BYTES // (1024 * 1024)} MB"
+    )
+
+class UploadSizeLimitMiddleware:
+    """Rejects oversized prescription uploads before the form is parsed.
+
+    By the time the route runs, Starlette has already spooled the whole
+    multipart body, so the cap has to sit in front of the parser: a
+    Content-Length over the limit is answered with 413 straight away, and
+    a body without one (chunked) is cut off once too many bytes arrive.
+    """
+
+    def __init__(self, app, path="/api/prescriptions/upload", max_bytes=MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES):
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            error = upload_too_large()
+            await JSONResponse({"detail": error.detail}, status_code=error.status_code)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def receive_limited():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise upload_too_large()
+            return message
+
+        await self.app(scope, receive_limited, send)
+
+async def save_upload(file: UploadFile):
+    """Copy a parsed upload to its own file in fixed-size chunks.
+
+    The first chunk is sniffed with libmagic and the content is hashed on
+    the way through. Each upload gets its own file; the SHA-256 is only
+    returned for content_hash so identical images can share derivatives.
+    The size is checked again here, though UploadSizeLimitMiddleware has
+    already kept oversized bodies out. Returns (path, sha256 hexdigest).
+    """
+    if not _upload_dir_ready:
+        ensure_upload_dirs()
+    digest = hashlib.sha256()
+    upload_id = uuid.uuid4()
+    temp_path = os.path.join(UPLOAD_DIR, f"{upload_id}.part")
+    received = 0
+    extension = None
+    
+    try:
+        async with aiofiles.open(temp_path, "wb") as buffer:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                if extension is None:
+                    mime_type = magic.from_buffer(chunk, mime=True)
+                    if not mime_type.startswith("image/"):
+                        raise HTTPException(status_code=400, detail="Only image files are allowed")
+                    if mime_type in UNSUPPORTED_IMAGE_TYPES:
+                        raise HTTPException(status_code=400, detail="HEIC, HEIF and AVIF images aren't supported, please upload a JPEG or PNG")
+                    extension = IMAGE_EXTENSIONS.get(mime_type) or (mimetypes.guess_extension(mime_type) or ".img").lstrip(".")
+                
+                received += len(chunk)
+                if received > MAX_UPLOAD_BYTES:
+                    raise upload_too_large()
+                
+                digest.update(chunk)
+                await buffer.write(chunk)
+        
+        if extension is None:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty")
+        
+        file_path = os.path.join(UPLOAD_DIR, f"{upload_id}.{extension}")
+        await aiofiles.os.replace(temp_path, file_path)
+        return file_path, digest.hexdigest()
+    
+    except BaseException:
+        if await aiofiles.os.path.exists(temp_path):
+            await aiofiles.os.remove(temp_path)
+        raise
+
+@router.post("/upload", response_model=schemas.PrescriptionResult)
 async def upload_prescription(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
-    # Validate file type
-    if not file.content_type.startswith('image/'):
+    # Cheap early reject on the declared type; the real check is the sniff
+    if file.content_type and not file.content_type.startswith(("image/", "application/octet-stream")):
         raise HTTPException(status_code=400, detail="Only image files are allowed")
     
-    # Generate unique filename
-    file_extension = file.filename.split('.')[-1]
-    filename = f"{uuid.uuid4()}.{file_extension}"
-    file_path = os.path.join(UPLOAD_DIR, filename)
-    
-    # Save file
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    file_path, content_hash = await save_upload(file)
     
     # Create prescription record
     prescription = models.Prescription(
         user_id=current_user.id,
         image_url=f"/{file_path}",
+        content_hash=content_hash,
         status="pending"
     )
     
+    # A re-upload of an already processed image reuses its derivatives
+    existing = find_existing_derivatives(db, content_hash)
+    if existing:
+        prescription.review_image_url, prescription.thumbnail_url = existing
+    
     db.add(prescription)
     db.commit()
     db.refresh(prescription)
     
+    if not existing:
+        background_tasks.add_task(process_prescription_image, file_path, content_hash)
+    
     return {
         "message": "Prescription uploaded successfully",
         "prescription": prescription
     }
 
-@router.get("/my-prescriptions")
+@router.get("/my-prescriptions", response_model=List[schemas.Prescription])
 def get_my_prescriptions(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     prescriptions = db.query(models.Prescription).filter(
         models.Prescription.user_id == current_user.id
     ).all()
     return prescriptions
 
-@router.get("/{prescription_id}")
+@router.get("/{prescription_id}", response_model=schemas.Prescription)
 def get_prescription(
     prescription_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     prescription = db.query(models.Prescription).filter(
         models.Prescription.id == prescription_id
@@ -76,12 +200,12 @@ def get_prescription(
     
     return prescription
 
-@router.put("/{prescription_id}/verify")
+@router.put("/{prescription_id}/verify", response_model=schemas.PrescriptionResult)
 def verify_prescription(
     prescription_id: int,
     verification_data: dict,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
     if current_user.role not in ["admin", "pharmacist"]:
         raise HTTPException(status_code=403, detail="Access denied")
@@ -93,13 +217,24 @@ def verify_prescription(
     if not prescription:
         raise HTTPException(status_code=404, detail="Prescription not found")
     
+    ensure_not_claimed_by_other(prescription, current_user)
     prescription.status = verification_data.get("status", prescription.status)
     prescription.verification_notes = verification_data.get("verification_notes")
     prescription.verified_by = current_user.id
+    if prescription.verified_at is None and prescription.status in ("verified", "rejected"):
+        # Turnaround analytics measure the first decision
+        prescription.verified_at = datetime.utcnow()
+    release_claim(prescription)
     
     db.commit()
     db.refresh(prescription)
     
+    event_broker.publish(prescription.user_id, "prescription.status", {
+        "id": prescription.id,
+        "status": prescription.status,
+        "verification_notes": prescription.verification_notes
+    })
+    
     return {
         "message": "Prescription verified successfully",
         "prescription": prescription
@@ -0,0 +1,139 @@
+"""Query-plan audit for the API's read routes.
+
+Replays the listing and detail routes in-process against DATABASE_URL,
+captures every SELECT they issue, runs EXPLAIN on each distinct statement
+with its real parameters and flags full-table scans.
+
+    python query_audit.py              # exits 1 if any route scans a table
+
+Only GET routes are exercised, so it is safe against a dev database. Run
+`python manage.py seed` first so there is an admin user to sign in as.
+Note that on near-empty PostgreSQL tables the planner may legitimately
+pick a sequential scan; audit against realistic data volumes.
+"""
+import json
+import re
+import sys
+from sqlalchemy import event, text
+from fastapi.testclient import TestClient
+from database import engine
+
+AUDIT_EMAIL = "admin@medicart.com"
+
+AUDITED_ROUTES = [
+    "/api/medicines/?limit=20",
+    "/api/medicines/?category=tablet&limit=20",
+    "/api/medicines/?search=napa",
+    "/api/medicines/featured",
+    "/api/medicines/1",
+    "/api/orders/my-orders",
+    "/api/orders/1",
+    "/api/prescriptions/my-prescriptions",
+    "/api/prescriptions/1",
+    "/api/consultations/my-consultations",
+    "/api/consultations/",
+    "/api/consultations/?status=pending",
+    "/api/queue/consultations",
+    "/api/queue/prescriptions",
+]
+
+# SQLite reports "SCAN <table>" for a full scan and "SCAN <table> USING
+# [COVERING] INDEX ..." for a full index walk; FTS lookups show up as
+# "VIRTUAL TABLE" and are fine
+SQLITE_SCAN = re.compile(r"^SCAN \w+")
+
+def explain_sqlite(conn, statement, parameters):
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    plan = [row[-1] for row in rows]
+    scans = [
+        line for line in plan
+        if SQLITE_SCAN.match(line) and " USING " not in line and "VIRTUAL TABLE" not in line
+    ]
+    return plan, scans
+
+def _postgres_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _postgres_nodes(child)
+
+def explain_postgres(conn, statement, parameters):
+    result = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+    root = (json.loads(result) if isinstance(result, str) else result)[0]["Plan"]
+    plan, scans = [], []
+    for node in _postgres_nodes(root):
+        line = f"{node['Node Type']} on {node.get('Relation Name', '-')}"
+        plan.append(line)
+        if node["Node Type"] == "Seq Scan":
+            scans.append(line)
+    return plan, scans
+
+class QueryAuditor:
+    def __init__(self, target_engine=engine):
+        self.engine = target_engine
+        self.current_route = None
+        self.findings = {}
+        self._explaining = False
+
+    def attach(self):
+        event.listen(self.engine, "before_cursor_execute", self._before_execute)
+
+    def detach(self):
+        event.remove(self.engine, "before_cursor_execute", self._before_execute)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self._explaining or executemany or not statement.lstrip().upper().startswith("SELECT"):
+            return
+        if statement in self.findings:
+            self.findings[statement]["routes"].add(self.current_route)
+            return
+
+        explain = explain_postgres if conn.dialect.name == "postgresql" else explain_sqlite
+        self._explaining = True
+        try:
+            plan, scans = explain(conn, statement, parameters)
+        except Exception as e:
+            plan, scans = [f"EXPLAIN failed: {e}"], []
+        finally:
+            self._explaining = False
+
+        self.findings[statement] = {"routes": {self.current_route}, "plan": plan, "scans": scans}
+
+    def run(self, app, headers=None):
+        client = TestClient(app)
+        self.attach()
+        try:
+            for route in AUDITED_ROUTES:
+                self.current_route = route
+                client.get(route, headers=headers or {})
+        finally:
+            self.detach()
+        return self.findings
+
+    def report(self, out=sys.stdout):
+        flagged = 0
+        for statement, finding in self.findings.items():
+            marker = "SCAN" if finding["scans"] else "ok  "
+            flagged += bool(finding["scans"])
+            print(f"[{marker}] {', '.join(sorted(finding['routes']))}", file=out)
+            print(f"       {' '.join(statement.split())[:160]}", file=out)
+            for line in finding["plan"]:
+                print(f"         {line}", file=out)
+        print(f"\n{len(self.findings)} distinct queries, {flagged} with full table scans", file=out)
+        return flagged
+
+def main():
+    from app import app
+    from auth import create_access_token
+
+    with engine.connect() as conn:
+        if conn.execute(text("SELECT 1 FROM users WHERE email = :email"), {"email": AUDIT_EMAIL}).first() is None:
+            print(f"{AUDIT_EMAIL} not found; run `python manage.py seed` first", file=sys.stderr)
+            return 2
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': AUDIT_EMAIL})}"}
+    auditor = QueryAuditor()
+    auditor.run(app, headers)
+    return 1 if auditor.report() else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,163 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import or_, tuple_, update
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime, timedelta
+import models
+import schemas
+from database import get_db
+from auth import get_current_user, UserPrincipal
+from pagination import encode_cursor, decode_cursor
+import os
+
+router = APIRouter(prefix="/queue", tags=["queue"])
+
+CLAIM_LEASE_SECONDS = int(os.getenv("QUEUE_CLAIM_LEASE_SECONDS", 900))
+MAX_CLAIM_BATCH = 20
+# Rows another pharmacist grabbed between our read and our conditional
+# UPDATE are skipped, so SQLite reads a few extra candidates per claim
+SQLITE_CANDIDATE_FACTOR = 4
+
+def consultation_priority(category: Optional[str]):
+    return 0 if category == "emergency" else 1
+
+def require_staff(current_user: UserPrincipal = Depends(get_current_user)):
+    if current_user.role not in ["admin", "pharmacist"]:
+        raise HTTPException(status_code=403, detail="Access denied")
+    return current_user
+
+def ensure_not_claimed_by_other(item, current_user):
+    if item.claimed_by not in (None, current_user.id) and item.claimed_until and item.claimed_until > datetime.utcnow():
+        raise HTTPException(status_code=409, detail="Claimed by another pharmacist")
+
+def release_claim(item):
+    item.claimed_by = None
+    item.claimed_until = None
+
+def queue_order(model):
+    # Emergency consultations first, then oldest. Ids are handed out in
+    # arrival order, so they stand in for created_at and keep the keyset
+    # comparison off timestamps, which SQLite stores as text
+    if model is models.Consultation:
+        return [model.priority, model.id]
+    return [model.id]
+
+def unclaimed(model, now):
+    return or_(model.claimed_until.is_(None), model.claimed_until < now)
+
+def list_queue(db, response, model, status, cursor, limit):
+    order = queue_order(model)
+    query = db.query(model).filter(model.status == status).order_by(*order)
+    if cursor:
+        types = [int] * len(order)
+        query = query.filter(tuple_(*order) > tuple_(*decode_cursor(cursor, *types)))
+
+    items = query.limit(limit).all()
+    if len(items) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(*[getattr(items[-1], column.key) for column in order])
+    return items
+
+def claim_items(db, model, user_id, limit):
+    """Lease up to limit pending items to user_id, in queue order.
+
+    PostgreSQL locks the candidate rows with FOR UPDATE SKIP LOCKED, so
+    concurrent claimers walk past each other's rows instead of queueing on
+    them. SQLite has no row locks; there each candidate is taken with a
+    conditional UPDATE that only succeeds if the row is still unclaimed.
+    """
+    now = datetime.utcnow()
+    values = {"claimed_by": user_id, "claimed_until": now + timedelta(seconds=CLAIM_LEASE_SECONDS)}
+    candidates = db.query(model.id).filter(
+        model.status == "pending", unclaimed(model, now)
+    ).order_by(*queue_order(model))
+
+    if db.bind.dialect.name == "postgresql":
+        claimed_ids = [row.id for row in candidates.limit(limit).with_for_update(skip_locked=True, of=model)]
+        if claimed_ids:
+            db.execute(
+                update(model).where(model.id.in_(claimed_ids)).values(**values)
+                .execution_options(synchronize_session=False)
+            )
+    else:
+        claimed_ids = []
+        for row in candidates.limit(limit * SQLITE_CANDIDATE_FACTOR).all():
+            result = db.execute(
+                update(model)
+                .where(model.id == row.id, model.status == "pending", unclaimed(model, now))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 1:
+                claimed_ids.append(row.id)
+                if len(claimed_ids) == limit:
+                    break
+    db.commit()
+
+    if not claimed_ids:
+        return []
+    return db.query(model).filter(model.id.in_(claimed_ids)).order_by(*queue_order(model)).all()
+
+def release_item(db, model, item_id, current_user):
+    item = db.query(model).filter(model.id == item_id).first()
+    if not item:
+        raise HTTPException(status_code=404, detail=f"{model.__name__} not found")
+    if item.claimed_by not in (None, current_user.id) and current_user.role != "admin":
+        raise HTTPException(status_code=409, detail="Claimed by another pharmacist")
+
+    release_claim(item)
+    db.commit()
+    return {"message": "Claim released"}
+
+@router.get("/consultations", response_model=List[schemas.Consultation])
+def get_consultation_queue(
+    response: Response,
+    status: str = "pending",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_staff)
+):
+    return list_queue(db, response, models.Consultation, status, cursor, limit)
+
+@router.post("/consultations/claim", response_model=List[schemas.Consultation])
+def claim_consultations(
+    limit: int = Query(1, ge=1, le=MAX_CLAIM_BATCH),
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_staff)
+):
+    return claim_items(db, models.Consultation, current_user.id, limit)
+
+@router.post("/consultations/{consultation_id}/release")
+def release_consultation(
+    consultation_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_staff)
+):
+    return release_item(db, models.Consultation, consultation_id, current_user)
+
+@router.get("/prescriptions", response_model=List[schemas.Prescription])
+def get_prescription_queue(
+    response: Response,
+    status: str = "pending",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_staff)
+):
+    return list_queue(db, response, models.Prescription, status, cursor, limit)
+
+@router.post("/prescriptions/claim", response_model=List[schemas.Prescription])
+def claim_prescriptions(
+    limit: int = Query(1, ge=1, le=MAX_CLAIM_BATCH),
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_staff)
+):
+    return claim_items(db, models.Prescription, current_user.id, limit)
+
+@router.post("/prescriptions/{prescription_id}/release")
+def release_prescription(
+    prescription_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(require_staff)
+):
+    return release_item(db, models.Prescription, prescription_id, current_user)
\ No newline at end of file
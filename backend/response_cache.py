@@ -0,0 +1,113 @@
+from collections import OrderedDict
+import hashlib
+import json
+import re
+import threading
+import time
+
+def normalize_message(message: str):
+    message = re.sub(r"\s+", " ", message.lower()).strip()
+    return message.rstrip("?!. ")
+
+def context_hash(context: dict = None):
+    encoded = json.dumps(context or {}, sort_keys=True, default=str)
+    return hashlib.sha1(encoded.encode()).hexdigest()
+
+def token_set(message: str):
+    return frozenset(re.findall(r"\w+", message))
+
+class CacheEntry:
+    __slots__ = ("response", "expires_at", "tokens", "context_key")
+
+    def __init__(self, response, expires_at, tokens, context_key):
+        self.response = response
+        self.expires_at = expires_at
+        self.tokens = tokens
+        self.context_key = context_key
+
+class ResponseCache:
+    """Bounded LRU cache of AI responses with per-entry TTL.
+
+    Entries are keyed on the normalized message plus a hash of the context.
+    When similarity_threshold is set, a miss falls back to the closest
+    cached message under the same context by token-set (Jaccard) overlap.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600, similarity_threshold=0.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _key(self, message: str, context: dict = None):
+        return (normalize_message(message), context_hash(context))
+
+    def get(self, message: str, context: dict = None):
+        key = self._key(message, context)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                del self._entries[key]
+                entry = None
+
+            if entry is None and self.similarity_threshold > 0:
+                key, entry = self._find_similar(key, now)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.response
+
+    def _find_similar(self, key, now):
+        tokens = token_set(key[0])
+        if not tokens:
+            return None, None
+
+        best_key, best_entry, best_score = None, None, self.similarity_threshold
+        for candidate_key, entry in self._entries.items():
+            if entry.context_key != key[1] or entry.expires_at <= now:
+                continue
+            union = len(tokens | entry.tokens)
+            score = len(tokens & entry.tokens) / union if union else 0.0
+            if score >= best_score:
+                best_key, best_entry, best_score = candidate_key, entry, score
+
+        if best_entry is not None:
+            self.similar_hits += 1
+        return best_key, best_entry
+
+    def set(self, message: str, response: str, context: dict = None):
+        key = self._key(message, context)
+        entry = CacheEntry(response, time.monotonic() + self.ttl_seconds, token_set(key[0]), key[1])
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
\ No newline at end of file
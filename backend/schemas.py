@@ -0,0 +1,97 @@
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
+from datetime import datetime
+
+class OrmModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+class Medicine(OrmModel):
+    id: int
+    sku: Optional[str] = None
+    name: str
+    description: Optional[str] = None
+    price: float
+    category: Optional[str] = None
+    manufacturer: Optional[str] = None
+    stock: Optional[int] = None
+    requires_prescription: Optional[bool] = None
+    image_url: Optional[str] = None
+    is_featured: Optional[bool] = None
+    created_at: Optional[datetime] = None
+
+class MedicineSummary(OrmModel):
+    id: int
+    name: str
+    price: float
+    image_url: Optional[str] = None
+    requires_prescription: Optional[bool] = None
+
+class PrescriptionSummary(OrmModel):
+    id: int
+    status: Optional[str] = None
+    image_url: str
+    thumbnail_url: Optional[str] = None
+
+class Prescription(OrmModel):
+    id: int
+    user_id: Optional[int] = None
+    image_url: str
+    content_hash: Optional[str] = None
+    review_image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    status: Optional[str] = None
+    verified_by: Optional[int] = None
+    verification_notes: Optional[str] = None
+    verified_at: Optional[datetime] = None
+    claimed_by: Optional[int] = None
+    claimed_until: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class PrescriptionResult(BaseModel):
+    message: str
+    prescription: Prescription
+
+class Consultation(OrmModel):
+    id: int
+    user_id: Optional[int] = None
+    pharmacist_id: Optional[int] = None
+    question: str
+    response: Optional[str] = None
+    status: Optional[str] = None
+    category: Optional[str] = None
+    priority: Optional[int] = None
+    claimed_by: Optional[int] = None
+    claimed_until: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class ConsultationResult(BaseModel):
+    message: str
+    consultation: Consultation
+
+class OrderItem(OrmModel):
+    id: int
+    medicine_id: Optional[int] = None
+    quantity: int
+    price: float
+    medicine: Optional[MedicineSummary] = None
+
+class OrderSummary(OrmModel):
+    id: int
+    user_id: Optional[int] = None
+    prescription_id: Optional[int] = None
+    total_amount: float
+    status: Optional[str] = None
+    shipping_address: Optional[str] = None
+    payment_status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class OrderResult(BaseModel):
+    message: str
+    order: OrderSummary
+
+class Order(OrderSummary):
+    items: List[OrderItem] = []
+    prescription: Optional[PrescriptionSummary] = None
\ No newline at end of file
@@ -0,0 +1,138 @@
+from sqlalchemy import false, text, Integer, Float
+from sqlalchemy.orm import Session
+import difflib
+import re
+import models
+
+# Full-text search over medicine name, description and manufacturer.
+# SQLite uses an external-content FTS5 table kept in sync by triggers,
+# PostgreSQL uses expression GIN indexes (tsvector + pg_trgm).
+
+FTS_TABLE = "medicines_fts"
+FTS_VOCAB_TABLE = "medicines_fts_vocab"
+FUZZY_CUTOFF = 0.75
+FUZZY_CANDIDATES = 3
+
+PG_DOCUMENT = (
+    "to_tsvector('simple', coalesce(name, '') || ' ' || "
+    "coalesce(description, '') || ' ' || coalesce(manufacturer, ''))"
+)
+
+SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, description, manufacturer,
+        content='medicines', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_VOCAB_TABLE} USING fts5vocab({FTS_TABLE}, 'row')",
+    f"""CREATE TRIGGER IF NOT EXISTS medicines_fts_ai AFTER INSERT ON medicines BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description, manufacturer)
+        VALUES (new.id, new.name, new.description, new.manufacturer);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS medicines_fts_ad AFTER DELETE ON medicines BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, manufacturer)
+        VALUES ('delete', old.id, old.name, old.description, old.manufacturer);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS medicines_fts_au AFTER UPDATE OF name, description, manufacturer ON medicines BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, manufacturer)
+        VALUES ('delete', old.id, old.name, old.description, old.manufacturer);
+        INSERT INTO {FTS_TABLE}(rowid, name, description, manufacturer)
+        VALUES (new.id, new.name, new.description, new.manufacturer);
+    END""",
+]
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS ix_medicines_search_document ON medicines USING gin (({PG_DOCUMENT}))",
+    "CREATE INDEX IF NOT EXISTS ix_medicines_name_trgm ON medicines USING gin (name gin_trgm_ops)",
+]
+POSTGRES_INDEXES = {"ix_medicines_search_document", "ix_medicines_name_trgm"}
+
+def is_search_object(name: str, type_: str):
+    """True for the tables and indexes create_search_index manages outside Alembic."""
+    if type_ == "table":
+        # The FTS5 table, its vocab table and its _config/_data/_docsize/_idx shadows
+        return name.startswith(FTS_TABLE)
+    return type_ == "index" and name in POSTGRES_INDEXES
+
+def create_search_index(engine):
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        if dialect == "sqlite":
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": FTS_TABLE}
+            ).first()
+            for statement in SQLITE_DDL:
+                conn.execute(text(statement))
+            if not exists:
+                # Backfill rows that were inserted before the triggers existed
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        elif dialect == "postgresql":
+            for statement in POSTGRES_DDL:
+                conn.execute(text(statement))
+
+def tokenize(term: str):
+    return [token for token in re.findall(r"\w+", term.lower()) if token]
+
+def _fts_expression(tokens):
+    return " ".join(f'"{token}"*' for token in tokens)
+
+def _has_match(db: Session, expression: str):
+    return db.execute(
+        text(f"SELECT 1 FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q LIMIT 1"), {"q": expression}
+    ).first() is not None
+
+def _close_terms(db: Session, token: str):
+    # Only compare against vocabulary sharing the first letter, which keeps
+    # the candidate set small and lets fts5vocab use its term range scan
+    rows = db.execute(
+        text(f"SELECT term FROM {FTS_VOCAB_TABLE} WHERE term >= :lo AND term < :hi"),
+        {"lo": token[0], "hi": chr(ord(token[0]) + 1)}
+    ).all()
+    terms = [row[0] for row in rows]
+    return difflib.get_close_matches(token, terms, n=FUZZY_CANDIDATES, cutoff=FUZZY_CUTOFF)
+
+def _fuzzy_expression(db: Session, tokens):
+    groups = []
+    for token in tokens:
+        candidates = _close_terms(db, token) or [token]
+        group = " OR ".join(f'"{candidate}"*' for candidate in candidates)
+        groups.append(f"({group})")
+    return " AND ".join(groups)
+
+def _apply_sqlite(query, db: Session, tokens):
+    expression = _fts_expression(tokens)
+    if not _has_match(db, expression):
+        expression = _fuzzy_expression(db, tokens)
+
+    matches = text(
+        f"SELECT rowid, bm25({FTS_TABLE}, 10.0, 1.0, 3.0) AS rank "
+        f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q"
+    ).bindparams(q=expression).columns(rowid=Integer, rank=Float).subquery()
+
+    return query.join(matches, matches.c.rowid == models.Medicine.id).order_by(matches.c.rank)
+
+def _apply_postgres(query, tokens, term: str):
+    ts_query = " & ".join(f"{token}:*" for token in tokens)
+    matches = text(
+        f"SELECT id, ts_rank({PG_DOCUMENT}, to_tsquery('simple', :tsq)) "
+        f"+ similarity(name, :term) AS rank "
+        f"FROM medicines "
+        f"WHERE {PG_DOCUMENT} @@ to_tsquery('simple', :tsq) OR name % :term"
+    ).bindparams(tsq=ts_query, term=term).columns(id=Integer, rank=Float).subquery()
+
+    return query.join(matches, matches.c.id == models.Medicine.id).order_by(matches.c.rank.desc())
+
+def apply_search(query, db: Session, term: str):
+    tokens = tokenize(term)
+    if not tokens:
+        # A term of only punctuation matches nothing, not the whole catalog
+        return query.filter(false()) if term and term.strip() else query
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        return _apply_sqlite(query, db, tokens)
+    if dialect == "postgresql":
+        return _apply_postgres(query, tokens, term)
+
+    return query.filter(models.Medicine.name.ilike(f"%{term}%"))
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""Production launcher: gunicorn master with uvicorn worker processes.
+
+    python serve.py                                # WEB_CONCURRENCY workers on $PORT
+    python serve.py --workers 4 --bind 0.0.0.0:8000 --migrate
+
+The master does the one-time work before forking: it creates the upload
+directories, checks that the database schema is at the alembic head (or
+upgrades it with --migrate) and imports the app once (preload), so
+workers start from a warm copy and only run the startup hooks.
+
+Workers are recycled after --max-requests (with jitter) and given
+--graceful-timeout to finish in-flight requests, including SSE streams,
+on TERM or recycling. Send HUP to replace the workers; with preload the
+code isn't re-imported, so deploy new code with USR2 and then TERM the
+old master. Application loggers write to gunicorn's error log, where the
+master and each worker report how long after launch they were ready;
+a worker over COLD_START_TARGET_MS logs a warning.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from gunicorn.app.base import BaseApplication
+
+def env_int(name: str, default: int):
+    return int(os.getenv(name, default))
+
+class MedicartServer(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        # Send the app's module loggers through gunicorn's error log, so
+        # they share its handlers and format
+        error_log = logging.getLogger("gunicorn.error")
+        root = logging.getLogger()
+        root.handlers = error_log.handlers
+        root.setLevel(error_log.level)
+
+        started = time.perf_counter()
+        from app import app
+        error_log.info("Loaded app in %.0f ms", (time.perf_counter() - started) * 1000)
+        return app
+
+def when_ready(server):
+    # Drop connections opened for the schema check so no socket is shared
+    # across the fork
+    from database import engine
+    engine.dispose()
+    launched_at = float(os.environ["MEDICART_LAUNCHED_AT"])
+    server.log.info("Master %d ready %.0f ms after launch", os.getpid(), (time.time() - launched_at) * 1000)
+
+    if server.cfg.workers > 1:
+        # Caches and AI chat sessions live in each worker; a session_id that
+        # lands on another worker starts a fresh conversation
+        server.log.warning("Running %d workers; AI chat sessions are kept per worker", server.cfg.workers)
+        if os.getenv("EVENT_BROKER", "memory") == "memory":
+            server.log.warning("EVENT_BROKER=memory with several workers: live events only reach "
+                               "clients connected to the worker that published them; use EVENT_BROKER=postgres")
+
+def post_fork(server, worker):
+    # Workers spawned after the first batch (recycling, HUP) time their
+    # start from their own fork
+    if worker.age > server.cfg.workers:
+        os.environ["MEDICART_LAUNCHED_AT"] = str(time.time())
+
+def check_schema(migrate: bool):
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+    import manage
+
+    head = ScriptDirectory.from_config(manage.alembic_config()).get_current_head()
+    with manage.engine.connect() as connection:
+        current = MigrationContext.configure(connection).get_current_revision()
+    if current == head:
+        return
+    if migrate:
+        manage.init_db()
+        return
+    sys.exit(
+        f"Database schema is at {current or 'no revision'}, expected {head}: "
+        "run python manage.py init-db or start with --migrate"
+    )
+
+def main(argv=None):
+    launched_at = time.time()
+    os.environ["MEDICART_LAUNCHED_AT"] = str(launched_at)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Run the MediCart API with multiple worker processes")
+    parser.add_argument("--bind", default=os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', 8000)}"))
+    parser.add_argument("--workers", type=int, default=env_int("WEB_CONCURRENCY", os.cpu_count() or 1))
+    # Longer than the load balancer's idle timeout, so the proxy closes
+    # idle connections first and never reuses one the worker just dropped
+    parser.add_argument("--keepalive", type=int, default=env_int("WEB_KEEPALIVE", 65))
+    parser.add_argument("--graceful-timeout", type=int, default=env_int("WEB_GRACEFUL_TIMEOUT", 30))
+    parser.add_argument("--timeout", type=int, default=env_int("WEB_TIMEOUT", 60))
+    parser.add_argument("--max-requests", type=int, default=env_int("WEB_MAX_REQUESTS", 10000))
+    parser.add_argument("--max-requests-jitter", type=int, default=env_int("WEB_MAX_REQUESTS_JITTER", 1000))
+    parser.add_argument("--migrate", action="store_true", help="upgrade the schema instead of refusing to start")
+    args = parser.parse_args(argv)
+
+    from prescription_routes import ensure_upload_dirs
+    ensure_upload_dirs()
+    check_schema(args.migrate)
+
+    options = {
+        "bind": args.bind,
+        "workers": args.workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "keepalive": args.keepalive,
+        "graceful_timeout": args.graceful_timeout,
+        "timeout": args.timeout,
+        "max_requests": args.max_requests,
+        "max_requests_jitter": args.max_requests_jitter,
+        "when_ready": when_ready,
+        "post_fork": post_fork,
+        "accesslog": os.getenv("WEB_ACCESS_LOG"),
+    }
+    MedicartServer(options).run()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,29 @@
+import os
+import sys
+import tempfile
+
+# The app reads its settings at import, so the test database has to be
+# configured before any backend module is loaded
+WORK_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'test.db')}"
+os.environ.setdefault("GROQ_API_KEY", "test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+@pytest.fixture(scope="session")
+def client():
+    import manage
+    from app import app
+    manage.init_db()
+    manage.seed()
+    return TestClient(app)
+
+@pytest.fixture
+def login(client):
+    def login(email):
+        client.post("/api/auth/register", json={"name": "Patient", "email": email, "password": "pw", "phone": "1"})
+        token = client.post("/api/auth/login", json={"email": email, "password": "pw"}).json()["token"]
+        return {"Authorization": f"Bearer {token}"}
+    return login
\ No newline at end of file
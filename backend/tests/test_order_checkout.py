@@ -0,0 +1,42 @@
+"""Checkout must reject malformed lines before any stock is touched."""
+import pytest
+import database
+import models
+
+def stock_of(medicine_id):
+    db = database.SessionLocal()
+    try:
+        return db.get(models.Medicine, medicine_id).stock
+    finally:
+        db.close()
+
+@pytest.mark.parametrize("items", [
+    [{"medicine_id": 1, "quantity": -50}],
+    [{"medicine_id": 1, "quantity": 0}],
+    [{"medicine_id": 1, "quantity": 2}, {"medicine_id": 2, "quantity": -1}],
+    [{"medicine_id": "1", "quantity": 1}],
+    [{"medicine_id": 1, "quantity": 1.5}],
+    [],
+])
+def test_invalid_lines_are_rejected(client, login, items):
+    headers = login("checkout-invalid@example.com")
+    before = stock_of(1), stock_of(2)
+
+    response = client.post("/api/orders/", json={"items": items}, headers=headers)
+
+    assert response.status_code == 400
+    assert (stock_of(1), stock_of(2)) == before
+
+def test_repeated_lines_are_reserved_once(client, login):
+    headers = login("checkout-merge@example.com")
+    before = stock_of(1)
+
+    response = client.post("/api/orders/", json={
+        "items": [{"medicine_id": 1, "quantity": 2}, {"medicine_id": 1, "quantity": 3}]
+    }, headers=headers)
+
+    assert response.status_code == 200
+    order = client.get(f"/api/orders/{response.json()['order']['id']}", headers=headers).json()
+    assert [(item["medicine_id"], item["quantity"]) for item in order["items"]] == [(1, 5)]
+    assert order["total_amount"] == pytest.approx(5 * order["items"][0]["price"])
+    assert stock_of(1) == before - 5
\ No newline at end of file
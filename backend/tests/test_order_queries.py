@@ -0,0 +1,48 @@
+"""The order history must cost the same number of queries however long it is."""
+from sqlalchemy import event
+import database
+import models
+
+ITEMS_PER_ORDER = 3
+
+def add_orders(email, count):
+    db = database.SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.email == email).one()
+        medicine_ids = [medicine.id for medicine in db.query(models.Medicine).limit(ITEMS_PER_ORDER)]
+        for _ in range(count):
+            order = models.Order(user_id=user.id, total_amount=0, status="pending")
+            order.items = [models.OrderItem(medicine_id=medicine_id, quantity=2, price=10.0) for medicine_id in medicine_ids]
+            db.add(order)
+        db.commit()
+    finally:
+        db.close()
+
+def count_history_queries(client, headers):
+    # Warm the principal cache so only the history itself is counted
+    client.get("/api/orders/my-orders", headers=headers)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(database.engine, "before_cursor_execute", record)
+    try:
+        orders = client.get("/api/orders/my-orders", headers=headers).json()
+    finally:
+        event.remove(database.engine, "before_cursor_execute", record)
+    return orders, len(statements)
+
+def test_my_orders_query_count_is_constant(client, login):
+    one = login("one@example.com")
+    add_orders("one@example.com", 1)
+    many = login("many@example.com")
+    add_orders("many@example.com", 25)
+
+    orders, single_count = count_history_queries(client, one)
+    assert len(orders) == 1
+    orders, many_count = count_history_queries(client, many)
+    assert len(orders) == 25
+    assert all(len(order["items"]) == ITEMS_PER_ORDER for order in orders)
+
+    assert single_count == many_count == 2
\ No newline at end of file
@@ -2,6 +2,7 @@ class AIAssistant {
     constructor() {
         this.isOpen = false;
         this.messages = [];
+        this.sessionId = null;
         this.init();
     }
 
@@ -60,38 +61,77 @@ class AIAssistant {
         const loadingId = this.addMessage('Thinking...', 'bot', true);
 
         try {
-            const response = await this.getAIResponse(message);
+            const response = await this.getAIResponse(message, (partial) => {
+                this.renderMessage(loadingId, partial, 'bot');
+            });
             this.updateMessage(loadingId, response, 'bot');
         } catch (error) {
             this.updateMessage(loadingId, "I'm sorry, I'm having trouble connecting right now. Please try again later.", 'bot');
         }
     }
 
-    async getAIResponse(message) {
+    async getAIResponse(message, onToken) {
         try {
-            const response = await fetch(`${API_BASE_URL}/ai/chat`, {
+            const response = await fetch(`${API_BASE_URL}/ai/chat/stream`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
+                    'Accept': 'text/event-stream',
                 },
                 body: JSON.stringify({
                     message: message,
+                    session_id: this.sessionId,
                     context: this.getContext()
                 })
             });
 
-            if (!response.ok) {
+            if (!response.ok || !response.body) {
                 throw new Error('Failed to get AI response');
             }
 
-            const data = await response.json();
-            return data.response;
+            return await this.readEventStream(response.body, onToken);
         } catch (error) {
             console.error('AI Response Error:', error);
             return this.getFallbackResponse(message);
         }
     }
 
+    async readEventStream(body, onToken) {
+        const reader = body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let text = '';
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+
+            for (const event of events) {
+                const lines = event.split('\n');
+                const dataLine = lines.find(line => line.startsWith('data: '));
+                if (!dataLine) continue;
+
+                const data = JSON.parse(dataLine.slice(6));
+                if (lines.includes('event: session')) {
+                    // The server keeps the conversation; later turns only send this id
+                    this.sessionId = data.session_id;
+                } else if (data.token) {
+                    text += data.token;
+                    if (onToken) onToken(text);
+                }
+            }
+        }
+
+        if (!text) {
+            throw new Error('Empty AI response');
+        }
+        return text;
+    }
+
     getContext() {
         return {
             website: 'MediCart Pharmacy',
@@ -152,13 +192,21 @@ class AIAssistant {
         return messageId;
     }
 
-    updateMessage(messageId, newText, sender) {
+    renderMessage(messageId, newText, sender) {
         const messageElement = document.getElementById(messageId);
         if (messageElement) {
             messageElement.textContent = newText;
             messageElement.className = `message ${sender}-message`;
         }
-        
+
+        const chatMessages = document.getElementById('chatMessages');
+        if (chatMessages) {
+            chatMessages.scrollTop = chatMessages.scrollHeight;
+        }
+    }
+
+    updateMessage(messageId, newText, sender) {
+        this.renderMessage(messageId, newText, sender);
         this.messages.push({ text: newText, sender });
     }
 }
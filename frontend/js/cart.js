@@ -76,6 +76,50 @@ function clearCart() {
     showToast('Cart cleared!', 'info');
 }
 
+// Re-price the whole cart against the live catalog in one request and
+// update the stored prices; returns the quote, or null if it failed
+async function refreshCartQuote() {
+    if (cart.length === 0) return null;
+
+    try {
+        const response = await fetch(`${API_BASE_URL}/orders/quote`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                items: cart.map(item => ({ medicine_id: item.id, quantity: item.quantity }))
+            })
+        });
+        if (!response.ok) return null;
+
+        const quote = await response.json();
+        const lines = new Map(quote.items.map(line => [line.medicine_id, line]));
+        cart.forEach(item => {
+            const line = lines.get(item.id);
+            if (line && line.status !== 'not_found') {
+                item.price = line.price;
+                item.requires_prescription = line.requires_prescription;
+            }
+        });
+        localStorage.setItem('cart', JSON.stringify(cart));
+        displayCartItems();
+        return quote;
+    } catch (error) {
+        return null;
+    }
+}
+
+function quoteProblems(quote) {
+    return quote.items
+        .filter(line => line.status !== 'ok')
+        .map(line => {
+            const item = cart.find(item => item.id === line.medicine_id);
+            const name = line.name || (item && item.name) || `Item ${line.medicine_id}`;
+            return line.status === 'not_found'
+                ? `${name} is no longer available`
+                : `Only ${line.stock} of ${name} in stock`;
+        });
+}
+
 async function checkout() {
     if (!currentUser) {
         showToast('Please login to checkout', 'error');
@@ -83,6 +127,12 @@ async function checkout() {
         return;
     }
 
+    const quote = await refreshCartQuote();
+    if (quote && !quote.can_checkout) {
+        showToast(quoteProblems(quote).join('. '), 'error');
+        return;
+    }
+
     try {
         const token = localStorage.getItem('token');
         const orderData = {
@@ -123,5 +173,6 @@ if (document.getElementById('cartItems')) {
     document.addEventListener('DOMContentLoaded', function() {
         displayCartItems();
         updateAuthUI();
+        refreshCartQuote();
     });
 }
\ No newline at end of file
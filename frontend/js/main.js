@@ -74,6 +74,8 @@ function viewCart() {
 }
 
 // Product management
+const PRODUCT_LIST_FIELDS = 'id,name,price,manufacturer,image_url,requires_prescription';
+
 async function loadFeaturedProducts() {
     try {
         const response = await fetch(`${API_BASE_URL}/medicines/featured`);
@@ -90,7 +92,7 @@ async function loadFeaturedProducts() {
 
 async function loadAllProducts() {
     try {
-        const response = await fetch(`${API_BASE_URL}/medicines`);
+        const response = await fetch(`${API_BASE_URL}/medicines?fields=${PRODUCT_LIST_FIELDS}`);
         if (!response.ok) throw new Error('Failed to fetch products');
         
         const products = await response.json();